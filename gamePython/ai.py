@@ -0,0 +1,145 @@
+import random
+import time
+
+from simulation import Simulation
+from snapshot import Snapshotter
+from policies import LEFT, RIGHT, JUMP, DOWN, ATTACK1, ATTACK2, SPECIAL
+
+
+# --- LOOKAHEAD CPU ---
+# A policy (policy(sim, index) -> input mask) that plays by trying things
+# out. Every `replan` frames it saves the match with a Snapshotter, and for
+# each candidate input sequence restores that state into a private headless
+# Simulation, runs it `depth` frames ahead and scores the result. It then
+# plays the best sequence until the next plan. The opponent is assumed to
+# keep holding its last input. A plan costs one save, plus one restore and
+# `depth` steps per candidate, with no rendering.
+#
+# A candidate is (press, hold, follow): `press` for one frame, then `hold`
+# until halfway, then `follow`. That is enough for taps (jumps, attacks)
+# and for simple two-part plans (dash in, then swing). Directions are
+# relative to the opponent, so one set of candidates covers both sides.
+
+# Difficulty is search depth: frames looked ahead, how often it re-plans and
+# how many of the best first moves get their second half searched too
+DIFFICULTIES = {
+    "easy": {"depth": 8, "replan": 8, "beam": 0},
+    "normal": {"depth": 16, "replan": 4, "beam": 0},
+    "hard": {"depth": 24, "replan": 3, "beam": 3},
+}
+
+# Score weights: damage dealt and taken, stocks, staying over the stage
+STOCK_VALUE = 150
+DAMAGE_TAKEN_WEIGHT = 1.2
+HITSTUN_WEIGHT = 0.2
+DISTANCE_WEIGHT = 0.02
+OFFSTAGE_WEIGHT = 0.5
+EDGE_MARGIN = 250 # Closer than this to a blast zone edge counts as danger
+
+
+class LookaheadPolicy:
+    def __init__(self, seed=None, difficulty="normal"):
+        settings = DIFFICULTIES[difficulty]
+        self.rng = random.Random(seed) # Breaks ties between equal plans
+        self.difficulty = difficulty
+        self.depth = settings["depth"]
+        self.replan = settings["replan"]
+        self.beam = settings["beam"]
+        self.sim = None # The match the scratch simulation was built for
+        self.plan = []
+        self.step = 0
+        self.last_plan_time = 0.0 # Seconds the last plan took, for tuning
+
+    def __call__(self, sim, index):
+        if sim is None:
+            raise ValueError("lookahead policy needs the match state (server bots must decode)")
+        if sim is not self.sim:
+            self.attach(sim)
+        if self.step % self.replan == 0 or self.step >= len(self.plan):
+            self.plan = self.choose(sim, index)
+            self.step = 0
+        mask = self.plan[self.step]
+        self.step += 1
+        return mask
+
+    def attach(self, sim):
+        # A scratch match with the same fighters and stage, and snapshot
+        # layouts for copying state from the real one into it
+        self.sim = sim
+        p1, p2 = sim.characters
+        self.scratch = Simulation(p1.type, p2.type, sim.width, sim.height, stage=sim.stage)
+        self.source = Snapshotter(sim, slots=1)
+        self.target = Snapshotter(self.scratch, slots=1)
+        self.buffer = self.source.new_buffer()
+        self.plan = []
+        self.step = 0
+
+    # --- SEARCH ---
+    def candidates(self, sim, index):
+        # One-part plans, plus the second halves tried after the best of them
+        me, foe = sim.characters[index], sim.characters[1 - index]
+        toward = RIGHT if foe.x > me.x else LEFT
+        away = LEFT if toward == RIGHT else RIGHT
+        moves = [(toward, toward), (0, 0), (away, away), (JUMP | toward, toward), (JUMP | away, away),
+                 (ATTACK1, 0), (toward | ATTACK1, toward), (ATTACK2, 0), (SPECIAL, 0), (toward | SPECIAL, toward),
+                 (DOWN, DOWN)]
+        return [(press, hold, hold) for press, hold in moves], (toward | ATTACK1, JUMP | toward, SPECIAL)
+
+    def sequence(self, candidate):
+        press, hold, follow = candidate
+        half = self.depth // 2
+        return [press] + [hold] * (half - 1) + [follow] * (self.depth - half)
+
+    def choose(self, sim, index):
+        start_time = time.perf_counter()
+        scratch = self.scratch
+        length = self.source.save_to(self.buffer)
+        state = memoryview(self.buffer)[:length]
+        foe_mask = sim.prev_masks[1 - index] # Assume they keep doing what they are doing
+        masks = [0, 0]
+        masks[1 - index] = foe_mask
+
+        def rollout(candidate):
+            self.target.load_from(state)
+            sequence = self.sequence(candidate)
+            for mask in sequence:
+                masks[index] = mask
+                scratch.step(masks)
+                if scratch.winner:
+                    break
+            return self.score(sim, scratch, index) + self.rng.random() * 1e-3, sequence
+
+        plans, followups = self.candidates(sim, index)
+        results = sorted(((rollout(candidate), candidate) for candidate in plans), key=lambda r: -r[0][0])
+        best_score, best = results[0][0]
+        for _, (press, hold, _) in results[:self.beam]:
+            for follow in followups:
+                if follow != hold:
+                    score, sequence = rollout((press, hold, follow))
+                    if score > best_score:
+                        best_score, best = score, sequence
+        self.last_plan_time = time.perf_counter() - start_time
+        return best
+
+    def score(self, sim, scratch, index):
+        # How much better `scratch` (after the rollout) is than `sim` (now) for player index
+        me_now, foe_now = sim.characters[index], sim.characters[1 - index]
+        me, foe = scratch.characters[index], scratch.characters[1 - index]
+        score = STOCK_VALUE * ((foe_now.stock - foe.stock) - (me_now.stock - me.stock))
+        # A lost stock resets damage, so only count damage across an unchanged stock
+        if foe.stock == foe_now.stock:
+            score += (foe.damage - foe_now.damage) + HITSTUN_WEIGHT * foe.hitstun
+        if me.stock == me_now.stock:
+            score -= DAMAGE_TAKEN_WEIGHT * (me.damage - me_now.damage)
+
+        # Stay over the stage and away from the blast zones; otherwise close in
+        left, top, right, bottom = me.blast_zone
+        cx, cy = me.x + me.w / 2, me.y + me.h / 2
+        danger = max(0, left + EDGE_MARGIN - cx, cx - (right - EDGE_MARGIN),
+                     top + EDGE_MARGIN - cy, cy - (bottom - EDGE_MARGIN))
+        stage = scratch.platforms[0].rect
+        if not me.on_ground and (cx < stage.left or cx > stage.right):
+            danger += max(0, me.y - stage.top) # Below the stage's edge with nothing under it
+        score -= OFFSTAGE_WEIGHT * danger
+        score -= DISTANCE_WEIGHT * abs((foe.x + foe.w / 2) - cx)
+        return score
@@ -0,0 +1,274 @@
+import sys
+import time
+
+import numpy as np
+
+from simulation import *
+
+
+# --- BATCH ENGINE ---
+# Structure-of-arrays version of Character.move/update for N independent
+# matches stepped in lockstep. Every array has shape (matches, players).
+# Covers movement, jumping, gravity, AIR_RESISTANCE, platform collision,
+# KOs, cooldowns, attack timers and take_damage knockback; attacks and
+# projectiles are still started by the scalar Character code.
+
+LEFT_BIT = 1 << SIM_CONTROLS["left"]
+RIGHT_BIT = 1 << SIM_CONTROLS["right"]
+JUMP_BIT = 1 << SIM_CONTROLS["jump"]
+DOWN_BIT = 1 << SIM_CONTROLS["down"]
+
+CHAR_W = 35
+CHAR_H = 55
+
+
+class BatchSimulation:
+    def __init__(self, char_types, matches, width=WIDTH, height=HEIGHT, stage=DEFAULT_STAGE, seed=None):
+        # char_types: one fighter type per player slot, shared by every match
+        self.matches = matches
+        self.players = len(char_types)
+        self.rng = np.random.default_rng(seed)
+
+        self.stage = stage if isinstance(stage, Stage) else load_stage(stage, width, height)
+        self.width = self.stage.width # The world; a stage with its own size ignores width and height
+        self.height = self.stage.height
+        self.blast_zone = self.stage.blast_zone
+        platforms = self.platforms = self.stage.platforms
+        self.plat_left = [p.rect.left for p in platforms]
+        self.plat_right = [p.rect.right for p in platforms]
+        self.plat_top = [p.rect.top for p in platforms]
+        self.plat_bottom = [p.rect.bottom for p in platforms]
+        self.plat_passable = [p.is_passable for p in platforms]
+
+        shape = (matches, self.players)
+        spawns = self.stage.spawns # Laid out for the scalar Character's CHAR_W x CHAR_H
+        self.x = np.empty(shape)
+        self.y = np.empty(shape)
+        for p in range(self.players):
+            self.x[:, p], self.y[:, p] = spawns[p % len(spawns)]
+        self.x_previous = self.x.copy()
+        self.y_previous = self.y.copy()
+        self.vx = np.zeros(shape)
+        self.vy = np.zeros(shape)
+        self.on_ground = np.zeros(shape, dtype=bool)
+        self.jumps = np.full(shape, 2, dtype=np.int32)
+        self.facing_right = np.ones(shape, dtype=bool)
+        self.damage = np.zeros(shape)
+        self.hitstun = np.zeros(shape, dtype=np.int32)
+        self.stock = np.full(shape, 3, dtype=np.int32)
+        self.attack1_cooldown = np.zeros(shape, dtype=np.int32)
+        self.attack2_cooldown = np.zeros(shape, dtype=np.int32)
+        self.special_cooldown = np.zeros(shape, dtype=np.int32)
+        self.attack_frame = np.zeros(shape, dtype=np.int32)
+        self.is_attacking = np.zeros(shape, dtype=bool)
+        self.is_charging = np.zeros(shape, dtype=bool)
+        self.charge_level = np.zeros(shape, dtype=np.int32)
+
+        # Per-type stats come from the scalar Character so the two never drift apart
+        templates = [Character(0, 0, WHITE, SIM_CONTROLS, t) for t in char_types]
+        self.move_speed = np.broadcast_to(np.array([c.move_speed for c in templates]), shape)
+        self.floaty = np.broadcast_to(np.array([c.type == "mage" for c in templates]), shape)
+
+    @classmethod
+    def from_characters(cls, matches_of_characters, stage, width=WIDTH, height=HEIGHT):
+        # Build a batch whose state copies existing scalar Characters
+        types = [c.type for c in matches_of_characters[0]]
+        batch = cls(types, len(matches_of_characters), width, height, stage)
+        for m, chars in enumerate(matches_of_characters):
+            for p, char in enumerate(chars):
+                batch.load_character(m, p, char)
+        return batch
+
+    def load_character(self, m, p, char):
+        for name in STATE_FIELDS:
+            getattr(self, name)[m, p] = getattr(char, name)
+
+    def store_character(self, m, p, char):
+        for name in STATE_FIELDS:
+            value = getattr(self, name)[m, p]
+            setattr(char, name, value.item())
+
+    # --- INPUT (Character.move without attacks) ---
+    def move(self, masks):
+        masks = np.asarray(masks)
+        stunned = self.hitstun > 0
+        self.hitstun[stunned] -= 1
+        free = ~stunned
+
+        left = free & (masks & LEFT_BIT != 0)
+        right = free & ~left & (masks & RIGHT_BIT != 0)
+        idle = free & ~left & ~right
+        self.vx = np.where(left, -self.move_speed, np.where(right, self.move_speed, self.vx))
+        self.vx[idle] *= 0.8
+        self.facing_right[left] = False
+        self.facing_right[right] = True
+
+        jump = free & (masks & JUMP_BIT != 0) & (self.jumps > 0)
+        self.vy[jump] = -18
+        self.jumps[jump] -= 1
+        self.on_ground[jump] = False
+
+    # --- PHYSICS (Character.update) ---
+    def update(self, masks):
+        masks = np.asarray(masks)
+        x_prev = self.x_previous = self.x.copy()
+        y_prev = self.y_previous = self.y.copy()
+
+        charging = self.is_charging
+        self.charge_level[charging] = np.minimum(100, self.charge_level[charging] + 1)
+
+        was_on_ground = self.on_ground.copy()
+
+        # --- X-AXIS MOVEMENT & COLLISION ---
+        self.vx *= AIR_RESISTANCE
+        self.x += self.vx
+        # pygame.Rect truncates float coordinates toward zero
+        rx = np.trunc(self.x)
+        ry = np.trunc(self.y)
+        for left, right, top, bottom in zip(self.plat_left, self.plat_right, self.plat_top, self.plat_bottom):
+            hit = (rx < right) & (left < rx + CHAR_W) & (ry < bottom) & (top < ry + CHAR_H)
+            hit &= ~((y_prev + CHAR_H <= top) | (y_prev >= bottom))
+            push_left = hit & (self.vx > 0) & (x_prev + CHAR_W <= left)
+            push_right = hit & ~push_left & (self.vx < 0) & (x_prev >= right)
+            self.x[push_left] = left - CHAR_W
+            self.x[push_right] = right
+            self.vx[push_left | push_right] = 0
+
+        # --- Y-AXIS MOVEMENT & COLLISION ---
+        airborne = ~self.on_ground
+        self.vy[airborne] += GRAVITY
+        float_down = airborne & self.floaty & (self.vy > 0.5)
+        self.vy[float_down] -= GRAVITY * 0.4
+
+        self.y += self.vy
+        rx = np.trunc(self.x)
+        ry = np.trunc(self.y)
+
+        self.on_ground[:] = False
+        dropping = masks & DOWN_BIT != 0
+        done = np.zeros_like(dropping)
+        for left, right, top, bottom, passable in zip(self.plat_left, self.plat_right, self.plat_top,
+                                                      self.plat_bottom, self.plat_passable):
+            hit = ~done & (rx < right) & (left < rx + CHAR_W) & (ry < bottom) & (top < ry + CHAR_H)
+            if passable:
+                hit &= ~dropping
+
+            land = hit & (self.vy >= 0) & (y_prev + CHAR_H <= top + (self.vy + 2))
+            self.y[land] = top - CHAR_H
+            self.vy[land] = 0
+            self.on_ground[land] = True
+            self.jumps[land] = 2
+            self.vx[land & ~was_on_ground] = 0
+
+            bonk = np.zeros_like(land) if passable else hit & ~land & (self.vy < 0) & (y_prev >= bottom - 2)
+            self.y[bonk] = bottom
+            self.vy[bonk] = 0
+            done |= land | bonk
+
+        # Screen boundaries (KO)
+        left, top, right, bottom = self.blast_zone
+        ko = (self.y > bottom) | (self.x < left) | (self.x > right) | (self.y < top)
+        if ko.any():
+            self.respawn(ko)
+
+        # Attack cooldowns
+        for cooldown in (self.attack1_cooldown, self.attack2_cooldown, self.special_cooldown):
+            cooldown[cooldown > 0] -= 1
+
+        active = self.attack_frame > 0
+        self.attack_frame[active] -= 1
+        finished = active & (self.attack_frame == 0)
+        self.is_attacking[finished] = False
+
+    def respawn(self, ko):
+        self.stock[ko] -= 1
+        back = ko & (self.stock > 0)
+        count = int(back.sum())
+        self.x[back] = self.width // 2 + self.rng.integers(-100, 101, count)
+        self.y[back] = 100
+        self.vx[back] = 0
+        self.vy[back] = 0
+        self.damage[back] = 0
+        self.hitstun[back] = 0
+
+    def take_damage(self, hit, damage_amount, attacker_x, attacker_y, hitstun_multiplier=2.5):
+        # hit: boolean mask of victims; the other arguments broadcast against it
+        amount = np.broadcast_to(damage_amount, hit.shape)[hit]
+        self.damage[hit] += amount
+        knockback_strength = (self.damage[hit] / 8) + 5
+        self.hitstun[hit] = (amount * np.broadcast_to(hitstun_multiplier, hit.shape)[hit]).astype(np.int32)
+
+        dx = self.x[hit] - np.broadcast_to(attacker_x, hit.shape)[hit]
+        dy = self.y[hit] - np.broadcast_to(attacker_y, hit.shape)[hit]
+        dist = np.sqrt(dx*dx + dy*dy)
+        nonzero = dist > 0
+        dx[nonzero] /= dist[nonzero]
+        dy[nonzero] /= dist[nonzero]
+
+        self.vx[hit] = dx * knockback_strength
+        self.vy[hit] = dy * knockback_strength - 5
+        self.is_charging[hit] = False
+        self.charge_level[hit] = 0
+
+    def step(self, masks):
+        self.move(masks)
+        self.update(masks)
+
+
+STATE_FIELDS = ("x", "y", "x_previous", "y_previous", "vx", "vy", "on_ground", "jumps", "facing_right",
+                "damage", "hitstun", "stock", "attack1_cooldown", "attack2_cooldown", "special_cooldown",
+                "attack_frame", "is_attacking", "is_charging", "charge_level")
+
+
+# --- PARITY CHECK & THROUGHPUT ---
+
+def check_parity(matches=64, frames=600, seed=0):
+    # Run the scalar Character path and the batch side by side on random
+    # movement input and report the first field that differs.
+    char_types = ["warrior", "mage"]
+    rng = np.random.default_rng(seed)
+    movement = LEFT_BIT | RIGHT_BIT | JUMP_BIT | DOWN_BIT
+    scalar = [Simulation(*char_types) for _ in range(matches)]
+    batch = BatchSimulation.from_characters([s.characters for s in scalar], scalar[0].stage)
+
+    for frame in range(frames):
+        masks = rng.integers(0, 128, (matches, 2)) & movement
+        hits = rng.random((matches, 2)) < 0.01
+        amounts = rng.integers(1, 25, (matches, 2)).astype(float)
+        for m, sim in enumerate(scalar):
+            for p, char in enumerate(sim.characters):
+                keys = keys_from_mask(int(masks[m, p]))
+                char.move(keys, sim.projectiles)
+                char.update(sim.platforms, keys)
+                if hits[m, p]:
+                    char.take_damage(amounts[m, p], 640.0, 300.0)
+        batch.step(masks)
+        batch.take_damage(hits, amounts, 640.0, 300.0)
+
+        for m, sim in enumerate(scalar):
+            for p, char in enumerate(sim.characters):
+                if char.stock != 3:
+                    continue # Respawn offsets come from different RNGs
+                for name in STATE_FIELDS:
+                    expected = getattr(char, name)
+                    actual = getattr(batch, name)[m, p].item()
+                    if expected != actual:
+                        return f"frame {frame} match {m} player {p}: {name} {expected!r} != {actual!r}"
+    return None
+
+def benchmark(matches=4096, frames=300):
+    batch = BatchSimulation(["warrior", "ninja"], matches, seed=0)
+    rng = np.random.default_rng(0)
+    inputs = rng.integers(0, 16, (frames, matches, 2))
+    start = time.perf_counter()
+    for frame in range(frames):
+        batch.step(inputs[frame])
+    elapsed = time.perf_counter() - start
+    return matches * 2 * frames / elapsed
+
+
+if __name__ == "__main__":
+    mismatch = check_parity()
+    print("parity:", mismatch or "ok")
+    print(f"throughput: {benchmark():,.0f} character-steps/s")
+    sys.exit(1 if mismatch else 0)
@@ -0,0 +1,221 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+# Rendering needs a display surface but not a window: the SDL dummy driver
+# gives one everywhere, so results are comparable between machines and CI
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+from constants import *
+from game_platform import Platform
+from character import Character
+from simulation import Simulation, keys_from_mask, resolve_projectile_hits, SIM_CONTROLS
+from broadphase import index_platforms
+from stages import Stage, render_background
+from camera import Camera
+from policies import make_policy
+from render_cache import SPRITES, STAGES
+import runtime
+import main as game
+
+CHAR_LIST = ["warrior", "ninja", "hunter", "knight", "mage", "beast"]
+FIRE = 1 << SIM_CONTROLS["attack2"]
+REGRESSION_THRESHOLD = 0.10 # Slower than baseline by more than this fails the comparison
+
+
+# --- BENCHMARKS ---
+# Each benchmark takes a scale (1 = full length) and returns (seconds,
+# operations); results are microseconds per operation, best of several
+# repeats. Every scenario is seeded, so runs differ only in timing.
+
+def bench_character_update(scale):
+    sim = Simulation("warrior", "ninja", seed=1)
+    char = sim.characters[0]
+    keys = keys_from_mask(0)
+    count = int(20000 * scale)
+    start = time.perf_counter()
+    for _ in range(count):
+        char.update(sim.platforms, keys, sim.stage_index)
+    return time.perf_counter() - start, count
+
+def projectile_bench(count):
+    # One frame of projectile movement and hit checks with `count` fireballs kept in the air
+    def bench(scale):
+        sim = Simulation("mage", "hunter", seed=1)
+        rng = random.Random(1)
+        characters = sim.characters
+        frames = max(10, int(600 * scale))
+        start = time.perf_counter()
+        for _ in range(frames):
+            while len(sim.projectiles) < count:
+                sim.projectiles.spawn(rng.randrange(sim.width), rng.randrange(sim.height), rng.choice((-1, 1)),
+                                      characters[rng.randrange(2)], "fireball")
+            sim.projectiles.update()
+            sim.hit_grid.rebuild(characters)
+            resolve_projectile_hits(characters, sim.projectiles, sim.hit_grid)
+            for char in characters:
+                char.damage = 0 # Keep fighters on stage however many fireballs land
+        return time.perf_counter() - start, frames
+    return bench
+
+def draw_bench(char_type):
+    # Character.draw with labels, warm sprite and text caches
+    def bench(scale):
+        char = Character(400, 300, (200, 50, 50), {}, char_type)
+        char.draw(runtime.screen)
+        count = int(5000 * scale)
+        start = time.perf_counter()
+        for _ in range(count):
+            char.draw(runtime.screen)
+        return time.perf_counter() - start, count
+    return bench
+
+def bench_background_bake(scale):
+    sim = Simulation("warrior", "ninja", runtime.WIDTH, runtime.HEIGHT, seed=1)
+    count = max(3, int(30 * scale))
+    start = time.perf_counter()
+    for _ in range(count):
+        render_background(runtime.WIDTH, runtime.HEIGHT, sim.platforms)
+    return time.perf_counter() - start, count
+
+def bench_background_blit(scale):
+    sim = Simulation("warrior", "ninja", runtime.WIDTH, runtime.HEIGHT, seed=1)
+    game.stage_background(sim)
+    count = int(2000 * scale)
+    start = time.perf_counter()
+    for _ in range(count):
+        runtime.screen.blit(game.stage_background(sim), (0, 0))
+    return time.perf_counter() - start, count
+
+def hundred_platforms(sim):
+    rng = random.Random(1)
+    platforms = sim.platforms[:3]
+    while len(platforms) < 100:
+        platforms.append(Platform(rng.randrange(0, sim.width - 200), rng.randrange(150, sim.height - 200),
+                                  rng.randrange(80, 240), 15, is_passable=True))
+    sim.stage = Stage("hundred_platforms", "100 Platforms", sim.width, sim.height, platforms, sim.stage.spawns,
+                      sim.stage.blast_zone, index_platforms(platforms))
+    sim.platforms = platforms
+    sim.stage_index = sim.stage.index
+
+def frame_bench(p1, p2, inputs, stage=None):
+    # Whole frames: one simulation step plus the full fight screen
+    def bench(scale):
+        sim = Simulation(p1, p2, runtime.WIDTH, runtime.HEIGHT, seed=1)
+        if stage:
+            stage(sim)
+        policies = [make_policy(inputs, 1), make_policy(inputs, 2)] if inputs != "spam" else None
+        frames = max(10, int(600 * scale))
+        start = time.perf_counter()
+        for frame in range(frames):
+            if policies:
+                masks = [policy(sim, i) for i, policy in enumerate(policies)]
+            else:
+                masks = [FIRE if frame % 20 < 10 else 0] * 2 # Tap and release: charge shots and fireballs
+            sim.step(masks)
+            game.draw_fight_screen(runtime.screen, sim)
+        return time.perf_counter() - start, frames
+    return bench
+
+def bench_frame_scrolling_stage(scale):
+    # A 1v1 on a four-screen-wide stage: camera, tile culling and projectile sleep
+    sim = Simulation("warrior", "mage", seed=1, stage="skyline")
+    camera = Camera(sim.width, sim.height, runtime.WIDTH, runtime.HEIGHT, sim.stage.max_zoom)
+    policies = [make_policy("scripted", 1), make_policy("scripted", 2)]
+    frames = max(10, int(600 * scale))
+    start = time.perf_counter()
+    for _ in range(frames):
+        sim.step([policy(sim, i) for i, policy in enumerate(policies)])
+        camera.follow(sim.characters, 1 / FPS)
+        game.draw_fight_screen(runtime.screen, sim, camera=camera)
+    return time.perf_counter() - start, frames
+
+BENCHMARKS = {"character_update": bench_character_update}
+for _count in (16, 128, 1024):
+    BENCHMARKS[f"projectiles_{_count}"] = projectile_bench(_count)
+for _type in CHAR_LIST:
+    BENCHMARKS[f"draw_{_type}"] = draw_bench(_type)
+BENCHMARKS["background_bake"] = bench_background_bake
+BENCHMARKS["background_blit"] = bench_background_blit
+BENCHMARKS["frame_idle_1v1"] = frame_bench("warrior", "ninja", "idle")
+BENCHMARKS["frame_scripted_1v1"] = frame_bench("knight", "beast", "scripted")
+BENCHMARKS["frame_projectile_spam"] = frame_bench("mage", "hunter", "spam")
+BENCHMARKS["frame_100_platforms"] = frame_bench("warrior", "ninja", "scripted", hundred_platforms)
+BENCHMARKS["frame_scrolling_stage"] = bench_frame_scrolling_stage
+
+
+def run_benchmarks(names, repeats=5, scale=1.0, progress=None):
+    results = {}
+    for name in names:
+        SPRITES.clear()
+        STAGES.clear()
+        per_op = sorted(seconds / ops * 1e6 for seconds, ops in (BENCHMARKS[name](scale) for _ in range(repeats)))
+        results[name] = {"us": per_op[0], "median_us": per_op[len(per_op) // 2]}
+        if progress:
+            progress(name, results[name])
+    return results
+
+
+# --- BASELINES ---
+
+def environment():
+    return {"python": platform.python_version(), "pygame": pygame.version.ver, "machine": platform.machine(),
+            "resolution": [runtime.WIDTH, runtime.HEIGHT], "video_driver": os.environ["SDL_VIDEODRIVER"]}
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD):
+    # [(name, baseline us, current us, ratio, regressed)] for benchmarks in both runs
+    rows = []
+    for name, result in results.items():
+        if name in baseline:
+            old = baseline[name]["us"]
+            ratio = result["us"] / old if old else 1.0
+            rows.append((name, old, result["us"], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the simulation and renderer headlessly (SDL dummy driver).")
+    parser.add_argument("--only", nargs="+", metavar="NAME", help="benchmarks to run (prefix match); default all")
+    parser.add_argument("--repeats", type=int, default=5, help="runs per benchmark; the fastest is reported")
+    parser.add_argument("--quick", action="store_true", help="a fifth of the iterations, for a smoke run")
+    parser.add_argument("--json", metavar="PATH", help="write the results to PATH")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against a saved --json file; exit 1 on a regression")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="allowed slowdown vs the baseline")
+    parser.add_argument("--list", action="store_true", help="list benchmark names and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        print("\n".join(BENCHMARKS))
+        return
+    names = [name for name in BENCHMARKS if not args.only or any(name.startswith(p) for p in args.only)]
+
+    def progress(name, result):
+        print(f"{name:<24}{result['us']:>12.2f} us  (median {result['median_us']:.2f})", file=sys.stderr, flush=True)
+
+    results = run_benchmarks(names, args.repeats, 0.2 if args.quick else 1.0, progress)
+    report = {"environment": environment(), "repeats": args.repeats, "quick": args.quick, "results": results}
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("environment") != report["environment"]:
+            print("warning: baseline was recorded in a different environment", file=sys.stderr)
+        rows = compare(results, baseline["results"], args.threshold)
+        print(f"\n{'benchmark':<24}{'baseline':>12}{'now':>12}{'change':>9}")
+        for name, old, new, ratio, regressed in rows:
+            print(f"{name:<24}{old:>12.2f}{new:>12.2f}{(ratio - 1) * 100:>+8.1f}%{'  REGRESSION' if regressed else ''}")
+        regressions = [row[0] for row in rows if row[4]]
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
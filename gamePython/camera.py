@@ -0,0 +1,63 @@
+import math
+import pygame
+
+CAMERA_MARGIN = 250 # World pixels kept in view around the fighters
+MIN_ZOOM = 0.5 # Widest view, twice the screen each way: drawing cost is bounded by the screen, not the stage
+CAMERA_RATE = 5.0 # How fast the view catches up, per second (exponential smoothing)
+CULL_MARGIN = 100 # Entities are tested at their position; this covers sprites and effects around it
+
+
+# --- CAMERA ---
+# Maps the world onto the screen for stages bigger than it. The view is a
+# world-space rect that frames the live fighters plus CAMERA_MARGIN,
+# Smash-style: it zooms out as they separate and in (up to the stage's
+# max_zoom) as they close, clamped to the world edges. It is purely
+# cosmetic, not simulation state, so netplay and replays never see it.
+#
+# The fight screen draws the view 1:1 into a world-scale canvas and then
+# scales the canvas onto the screen; at zoom 1 it draws straight onto the
+# screen. When the whole world fits the screen the camera is `fixed` and the
+# game draws exactly as it did before cameras existed.
+
+class Camera:
+    def __init__(self, world_w, world_h, screen_w, screen_h, max_zoom=1.0):
+        self.world_w = world_w
+        self.world_h = world_h
+        self.screen_w = screen_w
+        self.screen_h = screen_h
+        self.fixed = world_w <= screen_w and world_h <= screen_h
+        # Zoomed out past `fit` the view would show beyond the world edges
+        fit = max(screen_w / world_w, screen_h / world_h)
+        self.min_zoom = max(fit, MIN_ZOOM)
+        self.max_zoom = max(max_zoom, self.min_zoom)
+        self.zoom = None # Set on the first follow()
+        self.cx = self.cy = 0.0
+        # One canvas at the widest view; each frame draws into a subsurface of it
+        self.canvas = None if self.fixed else pygame.Surface((math.ceil(screen_w / self.min_zoom) + 1,
+                                                              math.ceil(screen_h / self.min_zoom) + 1))
+
+    def follow(self, characters, dt):
+        # Ease toward framing the characters still in the match; dt in seconds
+        alive = [c for c in characters if c.stock > 0] or characters
+        left = min(c.x for c in alive) - CAMERA_MARGIN
+        right = max(c.x + c.w for c in alive) + CAMERA_MARGIN
+        top = min(c.y for c in alive) - CAMERA_MARGIN
+        bottom = max(c.y + c.h for c in alive) + CAMERA_MARGIN
+        zoom = min(self.screen_w / (right - left), self.screen_h / (bottom - top))
+        zoom = max(self.min_zoom, min(self.max_zoom, zoom))
+        cx, cy = (left + right) / 2, (top + bottom) / 2
+        if self.zoom is None:
+            self.zoom, self.cx, self.cy = zoom, cx, cy # Start framed, not swooping in
+            return
+        t = 1 - math.exp(-CAMERA_RATE * dt)
+        self.zoom += (zoom - self.zoom) * t
+        self.cx += (cx - self.cx) * t
+        self.cy += (cy - self.cy) * t
+
+    def view(self):
+        # The world-space rect on screen, inside the world
+        w = min(round(self.screen_w / self.zoom), self.world_w)
+        h = min(round(self.screen_h / self.zoom), self.world_h)
+        x = max(0, min(round(self.cx - w / 2), self.world_w - w))
+        y = max(0, min(round(self.cy - h / 2), self.world_h - h))
+        return pygame.Rect(x, y, w, h)
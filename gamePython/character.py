@@ -1,7 +1,54 @@
 import pygame
 import math
 from constants import *
-from projectile import Projectile
+from rng import MatchRandom
+from render_cache import SPRITES, render_text
+from moves import FIGHTERS, MOVES, HITBOX_OFFSETS
+import runtime
+
+SPRITE_PAD = 20 # Room around the 35x55 body for heads, feet, cannons and staffs
+SPRITE_KEY = (255, 0, 255) # Transparent colour of body sprites, used by no fighter
+
+
+# --- EFFECT SPRITES ---
+# Translucent attack effects, rendered once per size and alpha and cached in SPRITES
+
+def shadow_sprite(w, h):
+    s = pygame.Surface((w, h), pygame.SRCALPHA)
+    s.fill((50, 50, 200, 100)) # Translucent blue
+    return s
+
+def screw_sprite(w, h, alpha):
+    s = pygame.Surface((w, h), pygame.SRCALPHA)
+    pygame.draw.ellipse(s, (100, 255, 255, alpha), (0, 0, w, h))
+    pygame.draw.ellipse(s, (255, 255, 255, 200), (5, 5, w - 10, h - 10), 3)
+    return s
+
+def vertical_slash_sprite(w, h):
+    s = pygame.Surface((w, h), pygame.SRCALPHA)
+    pygame.draw.rect(s, (100, 100, 255, 200), (0, 0, w, h), border_radius=5)
+    pygame.draw.rect(s, (255, 255, 255, 220), (5, 5, w - 10, h - 10), 4, border_radius=5)
+    return s
+
+def horizontal_slash_sprite(w, h):
+    s = pygame.Surface((w, h), pygame.SRCALPHA)
+    pygame.draw.ellipse(s, (100, 100, 255, 200), (0, 0, w, h))
+    pygame.draw.ellipse(s, (255, 255, 255, 220), (5, 5, w - 10, h - 10), 4)
+    return s
+
+def bomb_sprite(w, h, alpha):
+    s = pygame.Surface((w, h), pygame.SRCALPHA)
+    pygame.draw.ellipse(s, (255, 100, 0, alpha), (0, 0, w, h))
+    pygame.draw.ellipse(s, (255, 255, 0, alpha), (10, 5, w - 20, h - 10))
+    return s
+
+def claw_sprite(w, h):
+    # Thicker claws
+    s = pygame.Surface((w, h), pygame.SRCALPHA)
+    pygame.draw.line(s, (255, 255, 255, 200), (0, 5), (w, h - 5), 6)
+    pygame.draw.line(s, (255, 255, 255, 200), (0, h / 2), (w, h / 2), 6)
+    pygame.draw.line(s, (255, 255, 255, 200), (0, h - 5), (w, 5), 6)
+    return s
 
 class Character:
     def __init__(self, x, y, color, controls, character_type):
@@ -31,37 +78,18 @@ class Character:
         self.is_charging = False
         self.charge_level = 0
         self.current_attack_name = None
-        
-        # Character-specific stats
-        if character_type == "warrior":
-            self.move_speed = 4.5
-            self.attack1_damage = 20
-            self.name = "Warrior"
-        elif character_type == "ninja":
-            self.move_speed = 6.5
-            self.attack1_damage = 9
-            self.name = "Ninja"
-        elif character_type == "hunter":
-            self.move_speed = 5.5
-            self.attack1_damage = 0 
-            self.special_damage = 14
-            self.name = "Hunter"
-        elif character_type == "knight":
-            self.move_speed = 5.0
-            self.attack1_damage = 16
-            self.attack2_damage = 22
-            self.special_damage = 6
-            self.name = "Knight"
-        elif character_type == "mage":
-            self.move_speed = 4.0
-            self.attack1_damage = 0
-            self.name = "Mage"
-        elif character_type == "beast":
-            self.move_speed = 4.0 # Slow
-            self.attack1_damage = 22 # Strong
-            self.attack2_damage = 14
-            self.special_damage = 25
-            self.name = "Beast"
+        self.damage_dealt = 0 # Match stat, not used by gameplay
+        self.rng = MatchRandom() # The Simulation shares its seeded per-match generator
+        # World bounds for KO and teleport clamping (the Simulation can resize them)
+        self.world_width = WIDTH
+        self.world_height = HEIGHT
+        self.blast_zone = (-100, -100, WIDTH + 100, HEIGHT + 100) # (left, top, right, bottom), set from the stage
+        
+        # Character-specific stats and moves (data/moves.json)
+        fighter = FIGHTERS[character_type]
+        self.name = fighter.name
+        self.move_speed = fighter.move_speed
+        self.moves = fighter.moves # (attack1, attack2, special)
         
     def get_rect(self):
         return pygame.Rect(self.x, self.y, self.w, self.h)
@@ -91,209 +119,83 @@ class Character:
             self.jumps -= 1
             self.on_ground = False
         
+        attack1, attack2, special = self.moves
+        
         # Attack 1
         if keys[self.controls['attack1']] and self.attack1_cooldown == 0:
-            if self.type == "warrior": self.hammer_smash()
-            elif self.type == "ninja": self.quick_slash()
-            elif self.type == "hunter": self.missile(projectiles)
-            elif self.type == "knight":
-                if self.on_ground:
-                    self.forward_slash()
-                else:
-                    self.forward_air() # New aerial attack
-            elif self.type == "mage": self.arcane_orb(projectiles)
-            elif self.type == "beast": self.beast_claw()
+            self.use_move(attack1, keys, projectiles)
         
         # Attack 2
         if keys[self.controls['attack2']] and self.attack2_cooldown == 0:
-            if self.type == "warrior": self.fire_blast(projectiles)
-            elif self.type == "ninja": self.ice_shuriken(projectiles)
-            elif self.type == "hunter": self.start_charge()
-            elif self.type == "knight": self.shield_breaker()
-            elif self.type == "mage": self.fire_blast(projectiles)
-            elif self.type == "beast": self.beast_fire(projectiles)
+            self.use_move(attack2, keys, projectiles)
         
         # Special move
         if keys[self.controls['special']] and self.special_cooldown == 0:
-            if self.type == "warrior": self.ground_pound()
-            elif self.type == "ninja": self.shadow_dash()
-            elif self.type == "hunter": self.screw_attack()
-            elif self.type == "knight": self.dancing_blade(keys)
-            elif self.type == "mage": self.teleport(keys)
-            elif self.type == "beast": self.beast_bomb()
-    
-    # --- WARRIOR MOVES ---
-    def hammer_smash(self):
-        self.is_attacking = True
-        self.attack1_cooldown = 45
-        self.attack_frame = 15
-        self.current_attack_name = "hammer_smash"
-        offset = 50 if self.facing_right else -50
-        self.attack_hitbox = pygame.Rect(self.x + offset, self.y + 10, 45, 45)
-    
-    def fire_blast(self, projectiles):
-        self.attack2_cooldown = 70
-        direction = 1 if self.facing_right else -1
-        offset = 50 if self.facing_right else -10
-        projectile = Projectile(self.x + offset, self.y + 30, direction, self, "fireball")
-        projectiles.append(projectile)
-    
-    def ground_pound(self):
-        self.vy = 20
-        self.vx = 0
-        self.special_cooldown = 60
-        self.is_attacking = True
-        self.attack_frame = 30
-        self.current_attack_name = "ground_pound"
-        self.attack_hitbox = pygame.Rect(self.x - 30, self.y + 50, 100, 30)
-    
-    # --- NINJA MOVES ---
-    def quick_slash(self):
-        self.is_attacking = True
-        self.attack1_cooldown = 15
-        self.attack_frame = 6
-        self.current_attack_name = "quick_slash"
-        offset = 45 if self.facing_right else -45
-        self.attack_hitbox = pygame.Rect(self.x + offset, self.y + 15, 35, 30)
+            self.use_move(special, keys, projectiles)
     
-    def ice_shuriken(self, projectiles):
-        self.attack2_cooldown = 35
+    # --- MOVES ---
+    def use_move(self, move, keys, projectiles):
+        # One routine for every move in data/moves.json; the definition supplies the numbers
+        if move.air and not self.on_ground:
+            move = move.air # Knight's forward air
+        if move.kind == "charge":
+            self.start_charge(move)
+            return
+        if move.kind == "teleport":
+            self.teleport(move, keys)
+            return
+        
         direction = 1 if self.facing_right else -1
-        offset = 50 if self.facing_right else -10
-        projectile = Projectile(self.x + offset, self.y + 25, direction, self, "ice_shard")
-        projectiles.append(projectile)
-    
-    def shadow_dash(self):
-        self.vy = -12
-        self.vx = 15 if self.facing_right else -15
-        self.special_cooldown = 40
-        self.is_attacking = True
-        self.attack_frame = 15
-        self.current_attack_name = "shadow_dash"
+        if move.vy is not None: self.vy = move.vy
+        if move.vx is not None: self.vx = move.vx * direction
+        if move.jumps is not None: self.jumps = move.jumps
+        setattr(self, move.cooldown_attr, move.cooldown)
+        
+        if move.active_frames:
+            self.is_attacking = True
+            self.attack_frame = move.active_frames
+            self.current_attack_name = move.name
+            if move.hitbox:
+                dx, dy = move.hitbox[self.facing_right]
+                self.attack_hitbox = pygame.Rect(self.x + dx, self.y + dy, *move.size)
+        
+        if move.projectile:
+            dx, dy = move.spawn[self.facing_right]
+            projectiles.spawn(self.x + dx, self.y + dy, direction, self, move.projectile)
     
-    # --- HUNTER MOVES ---
-    def missile(self, projectiles):
-        self.attack1_cooldown = 20
-        direction = 1 if self.facing_right else -1
-        offset = 50 if self.facing_right else -10
-        projectile = Projectile(self.x + offset, self.y + 30, direction, self, "missile")
-        projectiles.append(projectile)
-
-    def start_charge(self):
+    def start_charge(self, move):
         if not self.is_charging:
             self.is_charging = True
             self.charge_level = 0
-            self.attack2_cooldown = 10
+            self.attack2_cooldown = move.cooldown
             
     def fire_charge_shot(self, projectiles):
         if self.is_charging:
+            move = MOVES["charge_shot"]
             direction = 1 if self.facing_right else -1
-            offset = 50 if self.facing_right else -10
-            projectile = Projectile(self.x + offset, self.y + 30, direction, self, 
-                                  "charge_shot", charge_level=self.charge_level)
-            projectiles.append(projectile)
+            dx, dy = move.spawn[self.facing_right]
+            projectiles.spawn(self.x + dx, self.y + dy, direction, self,
+                              move.projectile, charge_level=self.charge_level)
             self.is_charging = False
             self.charge_level = 0
-            
-    def screw_attack(self):
-        self.vy = -13
-        self.vx = 0
-        self.jumps = 1
-        self.special_cooldown = 50
-        self.is_attacking = True
-        self.attack_frame = 25
-        self.current_attack_name = "screw_attack"
-        self.attack_hitbox = pygame.Rect(self.x - 20, self.y - 10, self.w + 40, self.h + 20)
-        
-    # --- KNIGHT MOVES ---
-    def forward_slash(self):
-        self.is_attacking = True
-        self.attack1_cooldown = 25
-        self.attack_frame = 10
-        self.current_attack_name = "forward_slash"
-        offset = 35 if self.facing_right else -65 # Was 40 and -70
-        width = 60
-        self.attack_hitbox = pygame.Rect(self.x + offset, self.y + 10, width, 45)
-        
-    def shield_breaker(self):
-        self.is_attacking = True
-        self.attack2_cooldown = 60
-        self.attack_frame = 20
-        self.current_attack_name = "shield_breaker"
-        offset = 25 if self.facing_right else -55 # Was 30 and -60
-        width = 50
-        self.attack_hitbox = pygame.Rect(self.x + offset, self.y - 20, width, 75)
-        
-    def dancing_blade(self, keys):
-        self.vx = 10 if self.facing_right else -10
-        self.vy = 0
-        self.special_cooldown = 40
-        self.is_attacking = True
-        self.attack_frame = 20
-        self.current_attack_name = "dancing_blade"
-        self.attack_hitbox = pygame.Rect(self.x + (35 if self.facing_right else -65), self.y + 10, 60, 45) # Was 40 and -70
-        
-    def forward_air(self):
-        self.is_attacking = True
-        self.attack1_cooldown = 25
-        self.attack_frame = 10
-        self.current_attack_name = "forward_air"
-        offset = 35 if self.facing_right else -65 # Was 30 and -60
-        width = 60
-        # A hitbox slightly higher than the grounded slash
-        self.attack_hitbox = pygame.Rect(self.x + offset, self.y + 5, width, 50)
-        
-    # --- MAGE MOVES ---
-    def arcane_orb(self, projectiles):
-        self.attack1_cooldown = 80
-        direction = 1 if self.facing_right else -1
-        offset = 50 if self.facing_right else -10
-        projectile = Projectile(self.x + offset, self.y + 30, direction, self, "arcane_orb")
-        projectiles.append(projectile)
-        
-    def teleport(self, keys):
-        self.special_cooldown = 50
-        self.current_attack_name = "teleport"
-        if keys[self.controls['right']]: self.x += 150
-        elif keys[self.controls['left']]: self.x -= 150
-        elif keys[self.controls['jump']]: self.y -= 150
-        else: self.x -= 150 if self.facing_right else -150
-        
-        self.x = max(0, min(self.x, WIDTH - self.w))
-        self.y = max(0, min(self.y, HEIGHT - self.h))
+        
+    def teleport(self, move, keys):
+        self.special_cooldown = move.cooldown
+        self.current_attack_name = move.name
+        distance = move.distance
+        if keys[self.controls['right']]: self.x += distance
+        elif keys[self.controls['left']]: self.x -= distance
+        elif keys[self.controls['jump']]: self.y -= distance
+        else: self.x -= distance if self.facing_right else -distance
+        
+        self.x = max(0, min(self.x, self.world_width - self.w))
+        self.y = max(0, min(self.y, self.world_height - self.h))
         self.vx = 0
         self.vy = 0
 
-    # --- BEAST MOVES ---
-    def beast_claw(self):
-        self.is_attacking = True
-        self.attack1_cooldown = 35
-        self.attack_frame = 12
-        self.current_attack_name = "beast_claw"
-        self.vx = 10 if self.facing_right else -10 # Lunge
-        offset = 40 if self.facing_right else -60
-        self.attack_hitbox = pygame.Rect(self.x + offset, self.y + 10, 50, 35)
-
-    def beast_fire(self, projectiles):
-        self.attack2_cooldown = 60
-        direction = 1 if self.facing_right else -1
-        offset = 40 if self.facing_right else -30
-        projectile = Projectile(self.x + offset, self.y + 20, direction, self, "fire_breath")
-        projectiles.append(projectile)
-        self.vx = -2 * direction # Recoil
-    
-    def beast_bomb(self):
-        self.vy = -10 # Leap
-        self.vx = 8 if self.facing_right else -8
-        self.special_cooldown = 70
-        self.is_attacking = True
-        self.attack_frame = 40 # Long animation
-        self.current_attack_name = "beast_bomb"
-        self.attack_hitbox = pygame.Rect(self.x - 25, self.y + 45, self.w + 50, 30)
-
     
     # --- PLATFORM LOGIC WITH DROP-THROUGH ---
-    def update(self, platforms, keys):
+    def update(self, platforms, keys, stage_index=None):
         self.x_previous = self.x 
         self.y_previous = self.y 
         
@@ -307,7 +209,8 @@ class Character:
         self.x += self.vx
         rect = self.get_rect() 
         
-        for platform in platforms:
+        # The stage index narrows the scan to nearby platforms, in list order
+        for platform in (stage_index.query(rect) if stage_index else platforms):
             if rect.colliderect(platform.rect):
                 if not (self.y_previous + self.h <= platform.rect.top or \
                         self.y_previous >= platform.rect.bottom):
@@ -333,7 +236,7 @@ class Character:
         
         is_dropping = keys[self.controls['down']] 
         
-        for platform in platforms:
+        for platform in (stage_index.query(rect) if stage_index else platforms):
             if rect.colliderect(platform.rect):
                 
                 # If platform is passable AND player is holding down...
@@ -359,7 +262,8 @@ class Character:
         
         
         # Screen boundaries (KO)
-        if self.y > HEIGHT + 100 or self.x < -100 or self.x > WIDTH + 100 or self.y < -100:
+        left, top, right, bottom = self.blast_zone
+        if self.y > bottom or self.x < left or self.x > right or self.y < top:
             self.respawn()
         
         # Attack cooldowns
@@ -373,42 +277,12 @@ class Character:
 
             # 1. Update hitbox position IF an attack is active
             if self.is_attacking and self.attack_hitbox:
-                if self.current_attack_name == "dancing_blade":
-                     self.attack_hitbox.x = self.x + (35 if self.facing_right else -65) # Updated
-                     self.attack_hitbox.y = self.y + 10
-                elif self.current_attack_name == "beast_bomb":
-                    self.attack_hitbox.x = self.x - 25
-                    self.attack_hitbox.y = self.y + 45
-                elif self.current_attack_name == "hammer_smash":
-                    offset = 50 if self.facing_right else -50
-                    self.attack_hitbox.x = self.x + offset
-                    self.attack_hitbox.y = self.y + 10
-                elif self.current_attack_name == "ground_pound":
-                    self.attack_hitbox.x = self.x - 30
-                    self.attack_hitbox.y = self.y + 50
-                elif self.current_attack_name == "quick_slash":
-                    offset = 45 if self.facing_right else -45
-                    self.attack_hitbox.x = self.x + offset
-                    self.attack_hitbox.y = self.y + 15
-                elif self.current_attack_name == "screw_attack":
-                    self.attack_hitbox.x = self.x - 20
-                    self.attack_hitbox.y = self.y - 10
-                elif self.current_attack_name == "forward_slash":
-                    offset = 35 if self.facing_right else -65 # Updated
-                    self.attack_hitbox.x = self.x + offset
-                    self.attack_hitbox.y = self.y + 10
-                elif self.current_attack_name == "shield_breaker":
-                    offset = 25 if self.facing_right else -55 # Updated
-                    self.attack_hitbox.x = self.x + offset
-                    self.attack_hitbox.y = self.y - 20
-                elif self.current_attack_name == "forward_air":
-                    offset = 35 if self.facing_right else -65 # Updated
-                    self.attack_hitbox.x = self.x + offset
-                    self.attack_hitbox.y = self.y + 5
-                elif self.current_attack_name == "beast_claw":
-                    offset = 40 if self.facing_right else -60
-                    self.attack_hitbox.x = self.x + offset
-                    self.attack_hitbox.y = self.y + 10
+                # Moves without a hitbox of their own (shadow_dash) leave a carried one in place
+                offsets = HITBOX_OFFSETS.get(self.current_attack_name)
+                if offsets:
+                    dx, dy = offsets[self.facing_right]
+                    self.attack_hitbox.x = self.x + dx
+                    self.attack_hitbox.y = self.y + dy
 
             # 2. Check if the attack has *finished* (This is now its own 'if' block)
             if self.attack_frame == 0:
@@ -436,33 +310,32 @@ class Character:
     def respawn(self):
         self.stock -= 1
         if self.stock > 0:
-            self.x = WIDTH // 2 + random.randint(-100, 100)
+            self.x = self.world_width // 2 + self.rng.randint(-100, 100)
             self.y = 100
             self.vx = 0; self.vy = 0
             self.damage = 0; self.hitstun = 0
     
     def draw(self, screen, draw_ui=False):
-        r, g, b = self.color
-        light_color = (min(255, r + 40), min(255, g + 40), min(255, b + 40))
-        dark_color = (max(0, r - 40), max(0, g - 40), max(0, b - 40))
-        
-        body_x, body_y, body_w, body_h = self.x + 8, self.y + 18, 24, 28
-        
-        if self.type == "warrior": self.draw_warrior(screen, body_x, body_y, body_w, body_h, light_color, dark_color)
-        elif self.type == "ninja": self.draw_ninja(screen, body_x, body_y, body_w, body_h, light_color, dark_color)
-        elif self.type == "hunter": self.draw_hunter(screen, body_x, body_y, body_w, body_h, light_color, dark_color)
-        elif self.type == "knight": self.draw_knight(screen, body_x, body_y, body_w, body_h, light_color, dark_color)
-        elif self.type == "mage": self.draw_mage(screen, body_x, body_y, body_w, body_h, light_color, dark_color)
-        elif self.type == "beast": self.draw_beast(screen, body_x, body_y, body_w, body_h, light_color, dark_color)
+        # The body is one blit of a cached sprite; attack effects are drawn live on top
+        body = SPRITES.get((self.type, self.color, self.facing_right), self.render_body)
+        bob = math.sin(pygame.time.get_ticks() / 200) * 3 if self.type == "mage" else 0
+        screen.blit(body, (self.x - SPRITE_PAD, self.y + bob - SPRITE_PAD))
+        
+        if self.type == "warrior": self.draw_warrior_attack(screen)
+        elif self.type == "ninja": self.draw_ninja_attack(screen)
+        elif self.type == "hunter": self.draw_hunter_attack(screen)
+        elif self.type == "knight": self.draw_knight_attack(screen)
+        elif self.type == "mage": self.draw_mage_attack(screen)
+        elif self.type == "beast": self.draw_beast_attack(screen)
         
         if not draw_ui:
-            damage_text = font.render(f"{int(self.damage)}%", True, WHITE)
+            damage_text = render_text(runtime.font, f"{int(self.damage)}%", WHITE)
             damage_bg = pygame.Rect(self.x - 10, self.y - 40, damage_text.get_width() + 20, 30)
             pygame.draw.rect(screen, BLACK, damage_bg)
             pygame.draw.rect(screen, self.color, damage_bg, 2)
             screen.blit(damage_text, (self.x, self.y - 35))
             
-            name_text = small_font.render(self.name, True, WHITE)
+            name_text = render_text(runtime.small_font, self.name, WHITE)
             screen.blit(name_text, (self.x - 5, self.y - 55))
             
             if self.is_charging and self.charge_level > 0:
@@ -472,7 +345,49 @@ class Character:
                 pygame.draw.rect(screen, GREEN, (self.x, self.y + self.h + 5, charge_width, 8))
                 pygame.draw.rect(screen, WHITE, charge_bar_rect, 1)
 
+    def draw_bounds(self, draw_ui=False):
+        # Screen area draw() can touch: the body sprite (with the mage's bob),
+        # effects left at the previous position (shadow dash, teleport ring),
+        # attack effects around the hitbox (the forward-air arc reaches two
+        # hitbox sizes past it), then the labels above
+        bounds = pygame.Rect(self.x - SPRITE_PAD, self.y - SPRITE_PAD - 3, self.w + SPRITE_PAD * 2, self.h + SPRITE_PAD * 2 + 6)
+        bounds.union_ip(bounds.move(self.x_previous - self.x, self.y_previous - self.y))
+        if self.attack_hitbox:
+            bounds.union_ip(self.attack_hitbox.inflate(self.attack_hitbox.width * 4, self.attack_hitbox.height * 4))
+        if not draw_ui:
+            damage_w = render_text(runtime.font, f"{int(self.damage)}%", WHITE).get_width() + 20
+            name_w = render_text(runtime.small_font, self.name, WHITE).get_width() + 5
+            bounds.union_ip((self.x - 10, self.y - 55, max(damage_w, name_w), 45))
+        return bounds
+
+    def render_body(self):
+        # Draw the body once into a padded sprite, using the same drawing code
+        # shifted so the character's corner sits at (SPRITE_PAD, SPRITE_PAD)
+        r, g, b = self.color
+        light_color = (min(255, r + 40), min(255, g + 40), min(255, b + 40))
+        dark_color = (max(0, r - 40), max(0, g - 40), max(0, b - 40))
+        
+        # Bodies are opaque, so a run-length encoded colour key blits much faster than per-pixel alpha
+        sprite = pygame.Surface((self.w + SPRITE_PAD * 2, self.h + SPRITE_PAD * 2))
+        sprite.fill(SPRITE_KEY)
+        sprite.set_colorkey(SPRITE_KEY, pygame.RLEACCEL)
+        x, y = self.x, self.y
+        self.x, self.y = SPRITE_PAD, SPRITE_PAD
+        body_x, body_y, body_w, body_h = self.x + 8, self.y + 18, 24, 28
+        
+        if self.type == "warrior": self.draw_warrior(sprite, body_x, body_y, body_w, body_h, light_color, dark_color)
+        elif self.type == "ninja": self.draw_ninja(sprite, body_x, body_y, body_w, body_h, light_color, dark_color)
+        elif self.type == "hunter": self.draw_hunter(sprite, body_x, body_y, body_w, body_h, light_color, dark_color)
+        elif self.type == "knight": self.draw_knight(sprite, body_x, body_y, body_w, body_h, light_color, dark_color)
+        elif self.type == "mage": self.draw_mage(sprite, body_x, body_y, body_w, body_h, light_color, dark_color)
+        elif self.type == "beast": self.draw_beast(sprite, body_x, body_y, body_w, body_h, light_color, dark_color)
+        
+        self.x, self.y = x, y
+        return sprite
+
     # --- CHARACTER DRAWING FUNCTIONS ---
+    # draw_<type> paints the body (cached by render_body); draw_<type>_attack
+    # paints the attack effects every frame
     
     def draw_warrior(self, screen, body_x, body_y, body_w, body_h, light_color, dark_color):
         # Body
@@ -489,7 +404,8 @@ class Character:
         pygame.draw.circle(screen, YELLOW, (head_x, head_y), head_size, 3)
         if self.facing_right: pygame.draw.circle(screen, BLACK, (head_x + 4, head_y), 3)
         else: pygame.draw.circle(screen, BLACK, (head_x - 4, head_y), 3)
-        
+    
+    def draw_warrior_attack(self, screen):
         # Attack animations
         if self.is_attacking and self.attack_hitbox:
             # Check if it's ground pound
@@ -527,7 +443,8 @@ class Character:
         pygame.draw.rect(screen, BLACK, (head_x - 12, head_y - 4, 24, 8))
         if self.facing_right: pygame.draw.circle(screen, CYAN, (head_x + 4, head_y - 2), 3)
         else: pygame.draw.circle(screen, CYAN, (head_x - 4, head_y - 2), 3)
-        
+    
+    def draw_ninja_attack(self, screen):
         # Attack animations
         if self.is_attacking:
             # Quick Slash
@@ -545,8 +462,7 @@ class Character:
             elif self.current_attack_name == "shadow_dash":
                 # Draw a translucent "shadow"
                 shadow_rect = pygame.Rect(self.x_previous, self.y_previous, self.w, self.h)
-                s = pygame.Surface((self.w, self.h), pygame.SRCALPHA)
-                s.fill((50, 50, 200, 100)) # Translucent blue
+                s = SPRITES.get(("shadow", self.w, self.h), shadow_sprite, self.w, self.h)
                 screen.blit(s, shadow_rect.topleft)
         
     def draw_hunter(self, screen, body_x, body_y, body_w, body_h, light_color, dark_color):
@@ -563,17 +479,14 @@ class Character:
         cannon_x = body_x + 25 if self.facing_right else body_x - 10
         pygame.draw.rect(screen, GREEN, (cannon_x, body_y + 8, 10, 12), border_radius=2)
         pygame.draw.circle(screen, GREEN, (cannon_x + (10 if self.facing_right else 0), body_y + 14), 8)
-
+    
+    def draw_hunter_attack(self, screen):
         # Add Screw Attack animation
         if self.is_attacking and self.current_attack_name == "screw_attack":
-            s = pygame.Surface((self.attack_hitbox.width, self.attack_hitbox.height), pygame.SRCALPHA)
-            s.fill((0, 0, 0, 0)) # Transparent background
-            
             # Draw spinning energy effect
+            w, h = self.attack_hitbox.size
             alpha = 100 + (self.attack_frame % 5) * 20 # Flashing effect
-            pygame.draw.ellipse(s, (100, 255, 255, alpha), (0, 0, self.attack_hitbox.width, self.attack_hitbox.height))
-            pygame.draw.ellipse(s, (255, 255, 255, 200), (5, 5, self.attack_hitbox.width-10, self.attack_hitbox.height-10), 3)
-            
+            s = SPRITES.get(("screw_attack", w, h, alpha), screw_sprite, w, h, alpha)
             screen.blit(s, self.attack_hitbox.topleft)
 
     def draw_knight(self, screen, body_x, body_y, body_w, body_h, light_color, dark_color):
@@ -587,17 +500,16 @@ class Character:
         head_x, head_y, head_size = self.x + 18, self.y + 10, 14
         pygame.draw.circle(screen, GRAY, (head_x, head_y), head_size)
         pygame.draw.rect(screen, DARK_GRAY, (head_x - 1, head_y - 2, 2, 8))
-        
+    
+    def draw_knight_attack(self, screen):
         # --- *** THIS IS THE MAIN FIX *** ---
         if self.is_attacking and self.attack_hitbox:
             
             # 1. Check for Shield Breaker
             if self.current_attack_name == "shield_breaker":
                 # Draw vertical slash effect directly to screen
-                s = pygame.Surface((self.attack_hitbox.width, self.attack_hitbox.height), pygame.SRCALPHA)
-                s.fill((0,0,0,0))
-                pygame.draw.rect(s, (100, 100, 255, 200), (0,0, self.attack_hitbox.width, self.attack_hitbox.height), border_radius=5)
-                pygame.draw.rect(s, (255, 255, 255, 220), (5,5, self.attack_hitbox.width-10, self.attack_hitbox.height-10), 4, border_radius=5)
+                w, h = self.attack_hitbox.size
+                s = SPRITES.get(("vertical_slash", w, h), vertical_slash_sprite, w, h)
                 screen.blit(s, self.attack_hitbox.topleft)
             
             # 2. Check for Forward Air (Marth-style)
@@ -622,15 +534,13 @@ class Character:
             # 3. All other slashes (Forward Slash, Dancing Blade)
             elif self.current_attack_name in ["forward_slash", "dancing_blade"]:
                 # Draw horizontal slash effect directly to screen
-                s = pygame.Surface((self.attack_hitbox.width, self.attack_hitbox.height), pygame.SRCALPHA)
-                s.fill((0,0,0,0))
-                pygame.draw.ellipse(s, (100, 100, 255, 200), (0,0, self.attack_hitbox.width, self.attack_hitbox.height))
-                pygame.draw.ellipse(s, (255, 255, 255, 220), (5,5, self.attack_hitbox.width-10, self.attack_hitbox.height-10), 4)
+                w, h = self.attack_hitbox.size
+                s = SPRITES.get(("horizontal_slash", w, h), horizontal_slash_sprite, w, h)
                 screen.blit(s, self.attack_hitbox.topleft)
         # --- END FIX ---
             
     def draw_mage(self, screen, body_x, body_y, body_w, body_h, light_color, dark_color):
-        draw_y = self.y + math.sin(pygame.time.get_ticks() / 200) * 3
+        draw_y = self.y # The floating bob is applied when the sprite is blitted
         pygame.draw.rect(screen, dark_color, (self.x + 12, draw_y + 46, 16, 14), border_radius=3)
         pygame.draw.rect(screen, self.color, (body_x, draw_y + 18, body_w, body_h), border_radius=5)
         
@@ -640,7 +550,8 @@ class Character:
         staff_x = self.x + 35 if self.facing_right else self.x
         pygame.draw.line(screen, (100, 50, 0), (staff_x, draw_y + 5), (staff_x, draw_y + 50), 4)
         pygame.draw.circle(screen, PURPLE, (staff_x, draw_y + 5), 6)
-
+    
+    def draw_mage_attack(self, screen):
         # Add Teleport animation
         # Draw effect for 5 frames after teleporting
         if self.special_cooldown > 45: 
@@ -677,26 +588,19 @@ class Character:
         pygame.draw.rect(screen, BLACK, (head_x - 10, head_y + 2, 20, 5))
         if self.facing_right: pygame.draw.circle(screen, RED, (head_x + 5, head_y - 2), 4)
         else: pygame.draw.circle(screen, RED, (head_x - 5, head_y - 2), 4)
-        
+    
+    def draw_beast_attack(self, screen):
         # Refined Beast animations
         if self.is_attacking and self.attack_hitbox:
             # Beast Bomb
             if self.current_attack_name == "beast_bomb": 
                 # Make it pulse
+                w, h = self.attack_hitbox.size
                 pulse_alpha = 100 + (self.attack_frame % 10) * 15
-                s = pygame.Surface((self.attack_hitbox.width, self.attack_hitbox.height), pygame.SRCALPHA)
-                s.fill((0, 0, 0, 0))
-                pygame.draw.ellipse(s, (255, 100, 0, pulse_alpha), (0, 0, self.attack_hitbox.width, self.attack_hitbox.height))
-                pygame.draw.ellipse(s, (255, 255, 0, pulse_alpha), (10, 5, self.attack_hitbox.width-20, self.attack_hitbox.height-10))
+                s = SPRITES.get(("beast_bomb", w, h, pulse_alpha), bomb_sprite, w, h, pulse_alpha)
                 screen.blit(s, self.attack_hitbox.topleft)
             # Beast Claw
             elif self.current_attack_name == "beast_claw":
-                # Thicker claws
-                s = pygame.Surface((self.attack_hitbox.width, self.attack_hitbox.height), pygame.SRCALPHA)
-                s.fill((0,0,0,0))
-                p1 = (0, 5)
-                p2 = (self.attack_hitbox.width, self.attack_hitbox.height - 5)
-                pygame.draw.line(s, (255, 255, 255, 200), p1, p2, 6)
-                pygame.draw.line(s, (255, 255, 255, 200), (0, self.attack_hitbox.height/2), (self.attack_hitbox.width, self.attack_hitbox.height/2), 6)
-                pygame.draw.line(s, (255, 255, 255, 200), (0, self.attack_hitbox.height - 5), (self.attack_hitbox.width, 5), 6)
+                w, h = self.attack_hitbox.size
+                s = SPRITES.get(("beast_claw", w, h), claw_sprite, w, h)
                 screen.blit(s, self.attack_hitbox.topleft)
\ No newline at end of file
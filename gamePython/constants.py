@@ -1,11 +1,12 @@
-import pygame
 import os
 
-pygame.init()
-pygame.font.init()
+# Plain values only: the window, clock and fonts live in runtime.py and are
+# created on first use, so importing this never touches SDL
 
 # Constants
-FPS = 60
+FPS = 60 # Simulation rate; every speed, cooldown and GRAVITY is per simulation step
+RENDER_FPS = 144 # Draw-rate cap, independent of FPS
+MAX_STEPS_PER_FRAME = 5 # Catch-up limit before the simulation drops time
 GRAVITY = 0.8
 AIR_RESISTANCE = 0.98
 
@@ -23,14 +24,7 @@ PURPLE = (200, 100, 255)
 CYAN = (100, 255, 255)
 PINK = (255, 100, 200)
 
-# Fullscreen Setup
-screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
-WIDTH, HEIGHT = screen.get_size() # Get actual screen size
-
-pygame.display.set_caption("Smash Bros Ultimate - Pygame")
-clock = pygame.time.Clock()
-
-# Fonts
-font = pygame.font.Font(None, 36)
-small_font = pygame.font.Font(None, 24)
-title_font = pygame.font.Font(None, 72)
\ No newline at end of file
+# Default world size for headless matches; the game uses the size of its window (runtime.WIDTH/HEIGHT)
+WIDTH = int(os.environ.get("SMASH_WIDTH", 1280))
+HEIGHT = int(os.environ.get("SMASH_HEIGHT", 720))
+DEFAULT_STAGE = "stadium" # data/stages/stadium.json
@@ -6,6 +6,8 @@ class Platform:
         self.rect = pygame.Rect(x, y, w, h)
         self.is_passable = is_passable
     
-    def draw(self, screen):
-        pygame.draw.rect(screen, DARK_GRAY, self.rect)
-        pygame.draw.rect(screen, GRAY, self.rect, 3)
\ No newline at end of file
+    def draw(self, screen, dx=0, dy=0):
+        # dx, dy shift it, for surfaces that hold only part of the world
+        rect = self.rect.move(dx, dy) if dx or dy else self.rect
+        pygame.draw.rect(screen, DARK_GRAY, rect)
+        pygame.draw.rect(screen, GRAY, rect, 3)
\ No newline at end of file
@@ -1,129 +1,296 @@
 import pygame
 import math
-import random
+import os
 import sys
+import time
+import argparse
 
 # Import all our custom files
 from constants import *
-from game_platform import Platform # <-- CHANGED THIS LINE
 from character import Character
-# Projectile is imported by character.py, so we don't need it here
+from simulation import Simulation, mask_from_keys
+from netplay import RollbackSession, UdpPeer, parse_address
+from replay import Replay, HashLog
+from render_cache import render_text
+from profiler import PROFILER
+from stages import stage_names, load_stage
+from camera import Camera, CULL_MARGIN
+from ai import LookaheadPolicy, DIFFICULTIES
+import runtime
+# Projectiles are spawned through the Simulation's ProjectilePool, so we don't need them here
 
 
 # --- HELPER FUNCTIONS ---
 
-def draw_char_select_screen(screen, char_list, p1_cursor, p2_cursor, p1_locked, p2_locked, char_colors):
-    
-    # Create a dictionary of dummy characters just for previews
-    char_previews = {
-        "warrior": Character(0, 0, char_colors["warrior"], {}, "warrior"),
-        "ninja": Character(0, 0, char_colors["ninja"], {}, "ninja"),
-        "hunter": Character(0, 0, char_colors["hunter"], {}, "hunter"),
-        "knight": Character(0, 0, char_colors["knight"], {}, "knight"),
-        "mage": Character(0, 0, char_colors["mage"], {}, "mage"),
-        "beast": Character(0, 0, char_colors["beast"], {}, "beast")
-    }
-
-    screen.fill((20, 20, 40))
-    title_text = title_font.render("CHOOSE YOUR FIGHTER", True, WHITE)
-    screen.blit(title_text, (WIDTH // 2 - title_text.get_width() // 2, 50))
+class CharSelectScreen:
+    # The menu keeps one preview fighter per box. Everything but the previews
+    # (background, title, boxes, names, cursors, status) is painted into a
+    # static layer only when a cursor or lock changes; other frames restore
+    # each preview's area from that layer and redraw just the fighters.
+    def __init__(self, char_list, char_colors):
+        self.char_list = char_list
+        self.char_colors = char_colors
+        self.previews = [Character(0, 0, char_colors[name], {}, name) for name in char_list]
+        
+        self.box_size = 150
+        self.gap = 20
+        self.start_x = (runtime.WIDTH - (len(char_list) * (self.box_size + self.gap) - self.gap)) // 2
+        self.start_y = runtime.HEIGHT // 2 - self.box_size // 2
+        self.boxes = [pygame.Rect(self.start_x + i * (self.box_size + self.gap), self.start_y, self.box_size, self.box_size)
+                      for i in range(len(char_list))]
+        # Inside the box border and cursor frames; the bobbing previews never leave it
+        self.areas = [box.inflate(-16, -16) for box in self.boxes]
+        
+        self.layer = pygame.Surface((runtime.WIDTH, runtime.HEIGHT))
+        self.state = None # Cursor and lock state the layer was painted for
     
-    box_size = 150
-    gap = 20
-    start_x = (WIDTH - (len(char_list) * (box_size + gap) - gap)) // 2
-    start_y = HEIGHT // 2 - box_size // 2
+    def reset(self):
+        # The screen was drawn over (a match); repaint everything next frame
+        self.state = None
     
-    for i, char_name in enumerate(char_list):
-        x = start_x + i * (box_size + gap)
-        box_rect = pygame.Rect(x, start_y, box_size, box_size)
+    def draw(self, screen, p1_cursor, p2_cursor, p1_locked, p2_locked, stage_title=""):
+        # Returns the rects to push, or None after a full repaint (flip instead)
+        state = (p1_cursor, p2_cursor, p1_locked, p2_locked, stage_title)
+        full = state != self.state
+        if full:
+            self.state = state
+            self.paint_layer(*state)
+            screen.blit(self.layer, (0, 0))
+        else:
+            for area in self.areas: screen.blit(self.layer, area, area)
         
-        pygame.draw.rect(screen, char_colors[char_name], box_rect)
-        pygame.draw.rect(screen, DARK_GRAY, box_rect, 5)
+        # --- Animation Logic ---
+        current_time = pygame.time.get_ticks() # One timestamp for every box
+        for i, preview_char in enumerate(self.previews):
+            char_name = preview_char.type
+            box_rect = self.boxes[i]
+            base_x = box_rect.centerx - preview_char.w / 2
+            base_y = box_rect.centery - preview_char.h / 2 + 10 # Base Y position
+            x_offset = 0
+            y_offset = 0
+            
+            # 1. Set idle animation based on personality
+            if char_name == "warrior":
+                y_offset = math.sin(current_time / 200) * 3 # Solid bob
+            elif char_name == "ninja":
+                y_offset = math.sin(current_time / 100) * 2 # Fast bob
+            elif char_name == "hunter":
+                x_offset = math.sin(current_time / 300) * 4 # Side-to-side scan
+            elif char_name == "knight":
+                y_offset = math.sin(current_time / 500) * 2 # Slow, steady bob
+            elif char_name == "mage":
+                y_offset = math.sin(current_time / 250) * 4 # Floating
+            elif char_name == "beast":
+                y_offset = math.sin(current_time / 150) * 4 # Heavy bounce
+            
+            # 2. Override with locked-in animation if this character is locked in
+            if (i == p1_cursor and p1_locked) or (i == p2_cursor and p2_locked):
+                x_offset = 0 # Stop any side-to-side
+                y_offset = math.sin(current_time / 120) * 6 # Faster, bigger bounce
+            
+            preview_char.x = base_x + x_offset
+            preview_char.y = base_y + y_offset
+            preview_char.draw(screen, draw_ui=True) # Cached body sprite, no labels
+        # --- End Animation Logic ---
         
-        # --- Draw the character preview sprite ---
-        preview_char = char_previews[char_name]
+        PROFILER.mark("select")
+        return None if full else self.areas
+    
+    def paint_layer(self, p1_cursor, p2_cursor, p1_locked, p2_locked, stage_title):
+        layer = self.layer
+        box_size, start_y = self.box_size, self.start_y
+        layer.fill((20, 20, 40))
+        title_text = render_text(runtime.title_font, "CHOOSE YOUR FIGHTER", WHITE)
+        layer.blit(title_text, (runtime.WIDTH // 2 - title_text.get_width() // 2, 50))
         
-        # --- Animation Logic ---
-        current_time = pygame.time.get_ticks()
-        base_x = box_rect.centerx - preview_char.w / 2
-        base_y = box_rect.centery - preview_char.h / 2 + 10 # Base Y position
-        x_offset = 0
-        y_offset = 0
+        for i, char_name in enumerate(self.char_list):
+            box_rect = self.boxes[i]
+            x = box_rect.x
+            
+            pygame.draw.rect(layer, self.char_colors[char_name], box_rect)
+            pygame.draw.rect(layer, DARK_GRAY, box_rect, 5)
+            
+            name_text = render_text(runtime.font, char_name.upper(), WHITE)
+            layer.blit(name_text, (x + box_size // 2 - name_text.get_width() // 2, start_y + box_size + 10))
+            
+            if i == p1_cursor:
+                cursor_color = RED if not p1_locked else (255, 0, 0)
+                pygame.draw.rect(layer, cursor_color, (x - 5, start_y - 5, box_size + 10, box_size + 10), 8)
+                p1_text = render_text(runtime.small_font, "P1", WHITE)
+                layer.blit(p1_text, (x + 5, start_y + 5))
+                
+            if i == p2_cursor:
+                cursor_color = BLUE if not p2_locked else (0, 0, 255)
+                pygame.draw.rect(layer, cursor_color, (x - 10, start_y - 10, box_size + 20, box_size + 20), 8)
+                p2_text = render_text(runtime.small_font, "P2", WHITE)
+                layer.blit(p2_text, (x + box_size - 30, start_y + 5))
+                
+        p1_status = "LOCKED IN" if p1_locked else "Press [F] to select"
+        p2_status = "LOCKED IN" if p2_locked else "Press [.] to select"
+        p1_status_text = render_text(runtime.font, p1_status, RED)
+        p2_status_text = render_text(runtime.font, p2_status, BLUE)
+        layer.blit(p1_status_text, (self.start_x, start_y + box_size + 60))
+        layer.blit(p2_status_text, (self.start_x + (len(self.char_list) - 1) * (box_size + self.gap) - p2_status_text.get_width() + box_size, start_y + box_size + 60))
+        
+        if stage_title:
+            stage_text = render_text(runtime.small_font, f"Stage: {stage_title}   [Tab] to change", WHITE)
+            layer.blit(stage_text, (runtime.WIDTH // 2 - stage_text.get_width() // 2, start_y + box_size + 110))
 
-        # 1. Set idle animation based on personality
-        if char_name == "warrior":
-            y_offset = math.sin(current_time / 200) * 3 # Solid bob
-        elif char_name == "ninja":
-            y_offset = math.sin(current_time / 100) * 2 # Fast bob
-        elif char_name == "hunter":
-            x_offset = math.sin(current_time / 300) * 4 # Side-to-side scan
-        elif char_name == "knight":
-            y_offset = math.sin(current_time / 500) * 2 # Slow, steady bob
-        elif char_name == "mage":
-            y_offset = math.sin(current_time / 250) * 4 # Floating
-        elif char_name == "beast":
-            y_offset = math.sin(current_time / 150) * 4 # Heavy bounce
 
-        # 2. Check if this character is locked in
-        is_p1_locked_here = (i == p1_cursor and p1_locked)
-        is_p2_locked_here = (i == p2_cursor and p2_locked)
+def with_interpolation(entity, alpha, method, *args, offset=(0, 0), **kwargs):
+    # Call method with the entity moved between its last two simulation states (alpha 0 = previous, 1 = current),
+    # then by -offset: the camera view's top-left, in whole pixels
+    x, y = entity.x, entity.y
+    ox, oy = offset
+    draw_x = entity.x_previous + (x - entity.x_previous) * alpha
+    draw_y = entity.y_previous + (y - entity.y_previous) * alpha
+    
+    # Respawns and teleports snap instead of streaking across the stage
+    if abs(draw_x - x) > 100 or abs(draw_y - y) > 100:
+        if not (ox or oy):
+            return method(*args, **kwargs)
+        draw_x, draw_y = x, y
+    
+    hitbox = getattr(entity, "attack_hitbox", None)
+    entity.x, entity.y = draw_x - ox, draw_y - oy
+    if hitbox:
+        entity.attack_hitbox = hitbox.move(round(draw_x - x) - ox, round(draw_y - y) - oy)
+    result = method(*args, **kwargs)
+    entity.x, entity.y = x, y
+    if hitbox:
+        entity.attack_hitbox = hitbox
+    return result
 
-        # 3. Override with locked-in animation if necessary
-        if is_p1_locked_here or is_p2_locked_here:
-            x_offset = 0 # Stop any side-to-side
-            y_offset = math.sin(current_time / 120) * 6 # Faster, bigger bounce
 
-        preview_char.x = base_x + x_offset
-        preview_char.y = base_y + y_offset
-        # --- End Animation Logic ---
+def draw_interpolated(entity, screen, alpha, offset=(0, 0), **kwargs):
+    with_interpolation(entity, alpha, entity.draw, screen, offset=offset, **kwargs)
+
+
+def stage_background(sim):
+    return sim.stage.background(runtime.WIDTH, runtime.HEIGHT)
+
+
+def draw_hud(screen, sim):
+    # Returns the rects it drew
+    player1, player2 = sim.characters
+    p1_stock = render_text(runtime.small_font, f"P1 ({player1.name}) Stock: {player1.stock}", RED)
+    p2_stock = render_text(runtime.small_font, f"P2 ({player2.name}) Stock: {player2.stock}", BLUE)
+    
+    controls_text = render_text(runtime.small_font, "P1: WASD+F,G,H (S to Drop) | P2: Arrows+.,,/ (Down to Drop) | ESC to QUIT", WHITE)
+    controls_text_width = controls_text.get_width()
+    return [screen.blit(p1_stock, (10, 10)), screen.blit(p2_stock, (runtime.WIDTH - 200, 10)),
+            screen.blit(controls_text, (runtime.WIDTH // 2 - controls_text_width // 2, runtime.HEIGHT - 30))]
+
+
+def draw_fight_screen(screen, sim, alpha=1.0, camera=None):
+    if camera and not camera.fixed:
+        draw_camera_view(screen, sim, alpha, camera)
+    else:
+        # One blit replaces a line per screen row and two rects per platform
+        screen.blit(stage_background(sim), (0, 0))
+        PROFILER.mark("background")
         
-        preview_char.draw(screen, draw_ui=True) # Call with draw_ui=True
-        # --- End preview sprite draw ---
+        for projectile in sim.projectiles: draw_interpolated(projectile, screen, alpha)
+        for char in sim.characters: draw_interpolated(char, screen, alpha) # draw_ui defaults to False
+        PROFILER.mark("entities")
+    draw_hud(screen, sim)
+    PROFILER.mark("hud")
+
+
+def draw_camera_view(screen, sim, alpha, camera):
+    # Stages bigger than the screen: only the background tiles, projectiles and
+    # fighters under the view are drawn, so the cost follows the screen size,
+    # not the stage size. Zoomed views are drawn 1:1 and scaled onto the screen.
+    view = camera.view()
+    zoomed = view.size != screen.get_size()
+    canvas = camera.canvas.subsurface((0, 0), view.size) if zoomed else screen
+    sim.stage.draw_view(canvas, view)
+    PROFILER.mark("background")
+    
+    visible = view.inflate(2 * CULL_MARGIN, 2 * CULL_MARGIN)
+    offset = view.topleft
+    for projectile in sim.projectiles:
+        if visible.collidepoint(projectile.x, projectile.y):
+            draw_interpolated(projectile, canvas, alpha, offset)
+    for char in sim.characters:
+        if visible.collidepoint(char.x, char.y):
+            draw_interpolated(char, canvas, alpha, offset)
+    if zoomed:
+        pygame.transform.scale(canvas, screen.get_size(), screen)
+    PROFILER.mark("entities")
+
+
+# --- DIRTY-RECT RENDERING ---
+# Opt-in (--dirty-rects) for machines where pushing the whole screen every
+# frame is the bottleneck. Each frame restores last frame's regions from the
+# baked stage, redraws the fighters, projectiles and HUD, and hands only the
+# old and new regions to pygame.display.update instead of flipping.
+
+class DirtyRenderer:
+    def __init__(self):
+        self.background = None # Stage the screen currently shows; None forces a full repaint
+        self.regions = [] # Everything drawn over the background last frame
+    
+    def reset(self):
+        self.background = None
+    
+    def draw(self, screen, sim, alpha=1.0, camera=None):
+        # Returns the rects to push, or None after a full repaint (flip instead)
+        if camera and not camera.fixed:
+            # A moving view changes every pixel; draw it all and repaint in full once it stops
+            draw_fight_screen(screen, sim, alpha, camera)
+            self.background = None
+            return None
+        background = stage_background(sim)
+        full = background is not self.background
+        if full:
+            self.background = background
+            screen.blit(background, (0, 0))
+        else:
+            for rect in self.regions: screen.blit(background, rect, rect)
+        PROFILER.mark("background")
         
-        name_text = font.render(char_name.upper(), True, WHITE)
-        screen.blit(name_text, (x + box_size // 2 - name_text.get_width() // 2, start_y + box_size + 10))
+        regions = [with_interpolation(p, alpha, p.draw_bounds) for p in sim.projectiles]
+        regions += [with_interpolation(char, alpha, char.draw_bounds) for char in sim.characters]
+        for projectile in sim.projectiles: draw_interpolated(projectile, screen, alpha)
+        for char in sim.characters: draw_interpolated(char, screen, alpha)
+        PROFILER.mark("entities")
+        regions += draw_hud(screen, sim)
+        PROFILER.mark("hud")
         
-        if i == p1_cursor:
-            cursor_color = RED if not p1_locked else (255, 0, 0)
-            pygame.draw.rect(screen, cursor_color, (x - 5, start_y - 5, box_size + 10, box_size + 10), 8)
-            p1_text = small_font.render("P1", True, WHITE)
-            screen.blit(p1_text, (x + 5, start_y + 5))
-            
-        if i == p2_cursor:
-            cursor_color = BLUE if not p2_locked else (0, 0, 255)
-            pygame.draw.rect(screen, cursor_color, (x - 10, start_y - 10, box_size + 20, box_size + 20), 8)
-            p2_text = small_font.render("P2", True, WHITE)
-            screen.blit(p2_text, (x + box_size - 30, start_y + 5))
-            
-    p1_status = "LOCKED IN" if p1_locked else "Press [F] to select"
-    p2_status = "LOCKED IN" if p2_locked else "Press [.] to select"
-    p1_status_text = font.render(p1_status, True, RED)
-    p2_status_text = font.render(p2_status, True, BLUE)
-    screen.blit(p1_status_text, (start_x, start_y + box_size + 60))
-    screen.blit(p2_status_text, (start_x + (len(char_list) - 1) * (box_size + gap) - p2_status_text.get_width() + box_size, start_y + box_size + 60))
+        dirty = None if full else self.regions + regions
+        self.regions = regions
+        return dirty
+
+
+def parse_args(char_list):
+    parser = argparse.ArgumentParser(description="Smash Bros Ultimate - Pygame")
+    parser.add_argument("--netplay", metavar="HOST:PORT", help="play online (rollback) against the peer at HOST:PORT")
+    parser.add_argument("--port", type=int, default=7400, help="local UDP port for --netplay")
+    parser.add_argument("--player", type=int, choices=(1, 2), default=1, help="which side this machine plays")
+    parser.add_argument("--p1", choices=char_list, default="warrior")
+    parser.add_argument("--p2", choices=char_list, default="ninja")
+    parser.add_argument("--stage", choices=stage_names(), default=DEFAULT_STAGE, help="stage from data/stages (Tab changes it on character select)")
+    parser.add_argument("--cpu", choices=list(DIFFICULTIES), help="player 2 is a CPU at this difficulty (local matches)")
+    parser.add_argument("--seed", type=int, help="match seed (random for local matches, 0 for --netplay; peers must agree)")
+    parser.add_argument("--world", metavar="WxH", help="world size for --netplay (both peers must agree)")
+    parser.add_argument("--record", metavar="PATH", help="save a replay of each local match: PATH, then PATH-2, PATH-3... (before the extension)")
+    parser.add_argument("--hash-log", metavar="PATH", help="save a per-frame state hash log of each local match, numbered like --record")
+    parser.add_argument("--dirty-rects", action="store_true", help="redraw and push only the changed parts of the fight screen")
+    parser.add_argument("--profile", metavar="PATH", help="time every frame phase and save them to PATH on exit (.json or .csv); F3 shows the overlay")
+    return parser.parse_args()
+
+def match_path(path, match):
+    # Match 1 saves to path itself and later ones to name-2.ext, name-3.ext...
+    if match == 1:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}-{match}{ext}"
 
 
 # --- MAIN GAME ---
 
 def main():
-    # --- Pokémon Stadium-style platform layout ---
-    main_stage_width = WIDTH * 0.6
-    main_stage_x = (WIDTH - main_stage_width) / 2
-    main_stage_y = HEIGHT - 150
-    
-    plat_width = 200
-    plat_height = 15
-    plat_y = HEIGHT - 350 # Higher than before
-    
-    platforms = [
-        # Main Stage (Solid)
-        Platform(main_stage_x, main_stage_y, main_stage_width, 20, is_passable=False),
-        # Left Platform (Passable)
-        Platform(main_stage_x + 50, plat_y, plat_width, plat_height, is_passable=True),
-        # Right Platform (Passable)
-        Platform(main_stage_x + main_stage_width - plat_width - 50, plat_y, plat_width, plat_height, is_passable=True),
-    ]
-    
     player1_controls = {'left': pygame.K_a, 'right': pygame.K_d, 'jump': pygame.K_w, 'down': pygame.K_s,
                         'attack1': pygame.K_f, 'attack2': pygame.K_g, 'special': pygame.K_h}
     player2_controls = {'left': pygame.K_LEFT, 'right': pygame.K_RIGHT, 'jump': pygame.K_UP, 'down': pygame.K_DOWN,
@@ -138,31 +305,53 @@ def main():
         "mage": (180, 50, 200),
         "beast": (100, 200, 50) # Bowser green
     }
+    args = parse_args(char_list)
+    screen = runtime.screen # Opens the window (after --help has had its chance to exit)
     
     game_state = "char_select"
+    char_select = CharSelectScreen(char_list, char_colors)
     p1_cursor, p2_cursor = 0, 1
     p1_locked, p2_locked = False, False
+    stage_list = stage_names()
+    stage_choice = stage_list.index(args.stage)
     
+    sim = None
+    camera = None
+    netplay = None
+    replay = None
+    hash_log = None
+    recorded = 0 # Matches saved so far, numbering their --record/--hash-log files
     player1, player2 = None, None
-    characters = []
-    projectiles = []
     winner = None
+    renderer = DirtyRenderer() if args.dirty_rects else None
+    cpu = LookaheadPolicy(args.seed, args.cpu) if args.cpu else None # Picks up each new sim by itself
+    PROFILER.enabled = bool(args.profile)
+    dirty = None # Rects for pygame.display.update this frame; None flips the whole screen
     
-    # --- Start positions based on HIGHER platforms ---
-    new_char_height = 55
-    new_char_width = 35
+    # --- Online rollback match: skip character select, keyboard drives the local side ---
+    if args.netplay:
+        world_w, world_h = map(int, args.world.split("x")) if args.world else (runtime.WIDTH, runtime.HEIGHT)
+        sim = Simulation(args.p1, args.p2, world_w, world_h, seed=args.seed or 0, stage=args.stage)
+        sim.profiler = PROFILER
+        camera = Camera(sim.width, sim.height, runtime.WIDTH, runtime.HEIGHT, sim.stage.max_zoom)
+        netplay = UdpPeer(RollbackSession(sim, args.player - 1), args.port, parse_address(args.netplay))
+        player1, player2 = sim.characters
+        game_state = "fighting"
     
-    left_plat = platforms[1] 
-    right_plat = platforms[2] 
-    
-    start_y = left_plat.rect.top - new_char_height
-    p1_start_x = left_plat.rect.centerx - (new_char_width / 2)
-    p2_start_x = right_plat.rect.centerx - (new_char_width / 2)
-    # --- End Start Pos ---
+    # --- Fixed timestep: physics at FPS, drawing at up to RENDER_FPS ---
+    step_time = 1.0 / FPS
+    accumulator = 0.0
+    last_time = time.perf_counter()
     
     running = True
     while running:
-        clock.tick(FPS)
+        runtime.clock.tick(RENDER_FPS)
+        PROFILER.begin()
+        dirty = None
+        now = time.perf_counter()
+        frame_time = now - last_time
+        accumulator += frame_time
+        last_time = now
         
         # --- EVENT LOOP ---
         for event in pygame.event.get():
@@ -171,6 +360,14 @@ def main():
             
             if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                 running = False
+            
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                PROFILER.toggle_overlay()
+                if not PROFILER.visible:
+                    # Partial redraws would leave the old overlay on screen
+                    char_select.reset()
+                    if renderer:
+                        renderer.reset()
                 
             if game_state == "char_select":
                 if event.type == pygame.KEYDOWN:
@@ -182,123 +379,120 @@ def main():
                         if event.key == player2_controls['left']: p2_cursor = (p2_cursor - 1) % len(char_list)
                         if event.key == player2_controls['right']: p2_cursor = (p2_cursor + 1) % len(char_list)
                         if event.key == player2_controls['attack1']: p2_locked = True
+                    if event.key == pygame.K_TAB:
+                        stage_choice = (stage_choice + 1) % len(stage_list)
                         
             elif game_state == "fighting":
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_r:
                         game_state = "char_select"
+                        char_select.reset()
                         p1_locked, p2_locked = False, False
                         winner = None
                 
-                if event.type == pygame.KEYUP:
-                    if player1.type == 'hunter' and event.key == player1_controls['attack2']:
-                        player1.fire_charge_shot(projectiles)
-                    if player2.type == 'hunter' and event.key == player2_controls['attack2']:
-                        player2.fire_charge_shot(projectiles)
-
             elif game_state == "game_over":
                 if event.type == pygame.KEYDOWN and event.key == pygame.K_r:
                     game_state = "char_select"
+                    char_select.reset()
                     p1_locked, p2_locked = False, False
                     winner = None
         
+        PROFILER.mark("events")
+        
         # --- GAME STATE LOGIC ---
         
         if game_state == "char_select":
-            draw_char_select_screen(screen, char_list, p1_cursor, p2_cursor, p1_locked, p2_locked, char_colors)
+            stage = load_stage(stage_list[stage_choice], runtime.WIDTH, runtime.HEIGHT)
+            dirty = char_select.draw(screen, p1_cursor, p2_cursor, p1_locked, p2_locked, stage.title)
             
             if p1_locked and p2_locked:
                 p1_char_type = char_list[p1_cursor]
                 p2_char_type = char_list[p2_cursor]
                 
-                player1 = Character(p1_start_x, start_y, RED, player1_controls, p1_char_type)
-                player2 = Character(p2_start_x, start_y, BLUE, player2_controls, p2_char_type)
-                characters = [player1, player2]
-                projectiles = []
+                sim = Simulation(p1_char_type, p2_char_type, runtime.WIDTH, runtime.HEIGHT, seed=args.seed, stage=stage)
+                sim.profiler = PROFILER
+                camera = Camera(sim.width, sim.height, runtime.WIDTH, runtime.HEIGHT, sim.stage.max_zoom)
+                replay = Replay.for_simulation(sim) if args.record else None
+                hash_log = HashLog() if args.hash_log else None
+                if netplay:
+                    netplay.close()
+                    netplay = None
+                player1, player2 = sim.characters
                 winner = None
+                accumulator = 0.0
+                if renderer:
+                    renderer.reset()
                 game_state = "fighting"
 
         elif game_state == "fighting":
-            keys = pygame.key.get_pressed()
-            
-            for char in characters:
-                char.move(keys, projectiles)
-                char.update(platforms, keys)
+            # Run as many steps as real time demands; a slow render skips drawn frames, not game time
+            steps = 0
+            while accumulator >= step_time and steps < MAX_STEPS_PER_FRAME and not sim.winner:
+                keys = pygame.key.get_pressed()
+                if netplay:
+                    # Local side always uses the P1 keys; a stall still spends the step
+                    netplay.poll()
+                    netplay.session.advance(mask_from_keys(keys, player1_controls))
+                    netplay.send()
+                else:
+                    masks = (mask_from_keys(keys, player1_controls),
+                             cpu(sim, 1) if cpu else mask_from_keys(keys, player2_controls))
+                    sim.step(masks)
+                    if replay:
+                        replay.record(masks, sim)
+                    if hash_log:
+                        hash_log.record(sim)
+                accumulator -= step_time
+                steps += 1
+            if accumulator >= step_time:
+                accumulator %= step_time # Too far behind (e.g. window drag): drop the backlog
+            alpha = accumulator / step_time
+            PROFILER.mark("input")
             
-            for projectile in projectiles[:]:
-                projectile.update()
-                if not projectile.active:
-                    projectiles.remove(projectile)
-            
-            # --- Attack logic ---
-            for i, attacker in enumerate(characters):
-                if attacker.is_attacking and attacker.attack_hitbox:
-                    for j, victim in enumerate(characters):
-                        if i != j and attacker.attack_hitbox.colliderect(victim.get_rect()):
-                            if victim.hitstun == 0:
-                                dmg = attacker.attack1_damage # Default damage
-                                stun_multiplier = 2.5 # Default stun
-                                
-                                # Get specific damage for multi-hit/special moves
-                                if attacker.type == 'knight':
-                                    if attacker.current_attack_name == "shield_breaker":
-                                        dmg = attacker.attack2_damage
-                                    elif attacker.current_attack_name == "dancing_blade":
-                                        dmg = attacker.special_damage
-                                    # Forward slash and forward air use default attack1_damage
-                                elif attacker.type == 'hunter':
-                                    dmg = attacker.special_damage
-                                elif attacker.type == 'beast':
-                                    if attacker.current_attack_name == "beast_bomb":
-                                        dmg = attacker.special_damage
-                                        stun_multiplier = 1.0 # Beast bomb stun
-                                    elif attacker.current_attack_name == "beast_claw":
-                                        dmg = attacker.attack1_damage
-                                    
-                                victim.take_damage(dmg, attacker.x, attacker.y, stun_multiplier) # Pass the multiplier
-                                
-                                # Attack now finishes based on attack_frame timer
-            
-            for projectile in projectiles[:]:
-                for char in characters:
-                    if char != projectile.owner and projectile.get_rect().colliderect(char.get_rect()):
-                        if char.hitstun == 0:
-                            char.take_damage(projectile.damage, projectile.x, projectile.y)
-                            projectiles.remove(projectile)
-                            break
-            
-            alive_players = [c for c in characters if c.stock > 0]
-            if len(alive_players) == 1:
-                winner = alive_players[0]
+            if sim.winner:
+                winner = sim.winner
                 game_state = "game_over"
+                if replay or hash_log:
+                    recorded += 1
+                if replay:
+                    replay.save(match_path(args.record, recorded))
+                    replay = None
+                if hash_log:
+                    hash_log.save(match_path(args.hash_log, recorded))
+                    hash_log = None
             
             # --- DRAW FIGHTING SCREEN ---
-            screen.fill(BLACK)
-            for i in range(HEIGHT):
-                color_value = int(50 + (i / HEIGHT) * 50)
-                pygame.draw.line(screen, (color_value, color_value, color_value + 50), (0, i), (WIDTH, i))
-            
-            for platform in platforms: platform.draw(screen)
-            for projectile in projectiles: projectile.draw(screen)
-            for char in characters: char.draw(screen) # draw_ui defaults to False
-            
-            p1_stock = small_font.render(f"P1 ({player1.name}) Stock: {player1.stock}", True, RED)
-            p2_stock = small_font.render(f"P2 ({player2.name}) Stock: {player2.stock}", True, BLUE)
-            screen.blit(p1_stock, (10, 10))
-            screen.blit(p2_stock, (WIDTH - 200, 10))
-            
-            controls_text = small_font.render("P1: WASD+F,G,H (S to Drop) | P2: Arrows+.,,/ (Down to Drop) | ESC to QUIT", True, WHITE)
-            controls_text_width = controls_text.get_width()
-            screen.blit(controls_text, (WIDTH // 2 - controls_text_width // 2, HEIGHT - 30))
+            camera.follow(sim.characters, frame_time)
+            if renderer:
+                dirty = renderer.draw(screen, sim, alpha, camera)
+            else:
+                draw_fight_screen(screen, sim, alpha, camera)
 
         elif game_state == "game_over":
-            winner_text = title_font.render(f"{winner.name} ({'P1' if winner == player1 else 'P2'}) Wins!", True, winner.color)
-            screen.blit(winner_text, (WIDTH // 2 - winner_text.get_width() // 2, HEIGHT // 2 - 100))
-            reset_text = font.render("Press R to return to Character Select", True, WHITE)
-            screen.blit(reset_text, (WIDTH // 2 - reset_text.get_width() // 2, HEIGHT // 2 - 0))
+            winner_text = render_text(runtime.title_font, f"{winner.name} ({'P1' if winner == player1 else 'P2'}) Wins!", winner.color)
+            screen.blit(winner_text, (runtime.WIDTH // 2 - winner_text.get_width() // 2, runtime.HEIGHT // 2 - 100))
+            reset_text = render_text(runtime.font, "Press R to return to Character Select", WHITE)
+            screen.blit(reset_text, (runtime.WIDTH // 2 - reset_text.get_width() // 2, runtime.HEIGHT // 2 - 0))
+        
+        if PROFILER.visible:
+            overlay_rect = PROFILER.draw_overlay(screen)
+            if dirty is not None:
+                dirty = dirty + [overlay_rect]
+            PROFILER.mark("overlay")
         
-        pygame.display.flip()
+        if dirty is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(dirty)
+        PROFILER.mark("flip")
+        PROFILER.end_frame()
     
+    if replay and replay.frames:
+        replay.save(match_path(args.record, recorded + 1)) # Quit mid-match: keep what was played
+    if hash_log and hash_log.hashes:
+        hash_log.save(match_path(args.hash_log, recorded + 1))
+    if args.profile:
+        PROFILER.export(args.profile)
     pygame.quit()
     sys.exit() # Use sys.exit for a clean exit
 
@@ -0,0 +1,75 @@
+import json
+import os
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+SLOTS = ("attack1", "attack2", "special")
+
+
+# --- MOVE TABLES ---
+# Every fighter's stats and moves are definitions in data/moves.json,
+# compiled once at import. Offsets that depend on facing are stored as
+# (left, right) pairs, so `pair[self.facing_right]` picks one without a
+# branch. The flat tables keyed by attack name are what the per-frame code
+# reads: hitbox placement in Character.update and damage in resolve_attacks.
+
+def per_facing(value):
+    # A number applies to both sides; {"left": .., "right": ..} gives one each
+    if isinstance(value, dict):
+        return (value["left"], value["right"])
+    return (value, value)
+
+class Move:
+    __slots__ = ("name", "kind", "slot", "cooldown_attr", "cooldown", "active_frames", "damage", "stun",
+                 "hitbox", "size", "vx", "vy", "jumps", "projectile", "spawn", "distance", "air")
+
+    def __init__(self, slot, name, cooldown, type="attack", active_frames=0, damage=0, stun=2.5, hitbox=None,
+                 impulse=None, jumps=None, projectile=None, spawn=None, distance=0, air=None):
+        impulse = impulse or {}
+        self.name = name
+        self.kind = type # "attack", or "charge"/"teleport" for moves with their own method
+        self.slot = slot
+        self.cooldown_attr = slot + "_cooldown"
+        self.cooldown = cooldown
+        self.active_frames = active_frames
+        self.damage = damage
+        self.stun = stun
+        # ((dx, dy) facing left, (dx, dy) facing right) from the fighter's top-left
+        self.hitbox = tuple((dx, hitbox["y"]) for dx in per_facing(hitbox["x"])) if hitbox else None
+        self.size = (hitbox["w"], hitbox["h"]) if hitbox else None
+        self.vx = impulse.get("vx") # Multiplied by the facing direction; None leaves vx alone
+        self.vy = impulse.get("vy")
+        self.jumps = jumps
+        self.projectile = projectile
+        self.spawn = tuple((dx, spawn["y"]) for dx in per_facing(spawn["x"])) if spawn else None
+        self.distance = distance
+        self.air = Move(slot, **air) if air else None # Used instead while airborne
+
+class Fighter:
+    def __init__(self, name, stats, moves):
+        self.name = name
+        self.move_speed = stats["move_speed"]
+        self.moves = tuple(Move(slot, **moves[slot]) for slot in SLOTS)
+
+def load_fighters(path=os.path.join(DATA_DIR, "moves.json")):
+    with open(path) as f:
+        definitions = json.load(f)
+    return {name: Fighter(**fields) for name, fields in definitions.items()}
+
+def compile_tables(fighters):
+    # Attack name -> hitbox offsets / (damage, stun). Names are shared across
+    # fighters (fire_blast), so one definition per name is required.
+    moves = {}
+    for fighter in fighters.values():
+        for move in fighter.moves:
+            for m in (move, move.air):
+                if m is None:
+                    continue
+                other = moves.setdefault(m.name, m)
+                if (other.hitbox, other.size, other.damage, other.stun) != (m.hitbox, m.size, m.damage, m.stun):
+                    raise ValueError(f"move {m.name!r} is defined differently by two fighters")
+    hitbox_offsets = {name: m.hitbox for name, m in moves.items() if m.hitbox}
+    hit_damage = {name: (m.damage, m.stun) for name, m in moves.items()}
+    return moves, hitbox_offsets, hit_damage
+
+FIGHTERS = load_fighters()
+MOVES, HITBOX_OFFSETS, HIT_DAMAGE = compile_tables(FIGHTERS)
@@ -0,0 +1,353 @@
+import argparse
+import heapq
+import multiprocessing
+import random
+import socket
+import struct
+import sys
+import time
+from collections import deque
+
+from simulation import Simulation
+from snapshot import Snapshotter
+
+
+# --- ROLLBACK SESSION ---
+# GGPO-style: local input is applied immediately, the remote player's input
+# is predicted (repeat their last confirmed input), and when the real input
+# arrives and differs the session restores the snapshot from that frame and
+# re-simulates up to the present.
+
+CHECKSUM_INTERVAL = 1 # Frames between desync checks; every frame pins a desync exactly
+CHECKSUMS_PER_PACKET = 8 # Recent checksums resent in every packet to survive loss
+
+
+class RollbackSession:
+    def __init__(self, sim, local_index, max_rollback=8):
+        self.sim = sim
+        self.local_index = local_index
+        self.remote_index = 1 - local_index
+        self.max_rollback = max_rollback
+        self.snapshots = Snapshotter(sim, slots=max_rollback + 2)
+
+        self.local_inputs = [] # Indexed by frame
+        self.remote_inputs = {} # frame -> confirmed mask
+        self.predicted = {} # frame -> remote mask the frame was simulated with
+        self.confirmed_frame = -1 # Every remote input up to here has arrived
+        self.acked_frame = -1 # Every local input up to here has reached the peer
+        self.rollback_from = None
+
+        self.checked_frame = -1
+        self.checksums = {}
+        self.remote_checksums = {}
+        self.recent_checksums = deque(maxlen=CHECKSUMS_PER_PACKET)
+        self.last_matched_frame = -1 # Last frame both peers verified as identical
+        self.desync_frame = None
+
+        # Stats
+        self.rollbacks = 0
+        self.resimulated_frames = 0
+        self.max_depth = 0
+        self.resim_time = 0.0
+        self.max_resim_time = 0.0
+        self.stalls = 0
+
+    # --- INPUTS ---
+    def can_advance(self):
+        # Never predict further ahead than the snapshot ring can undo
+        return self.sim.frame - self.confirmed_frame - 1 < self.max_rollback
+
+    def add_remote_input(self, frame, mask):
+        if frame <= self.confirmed_frame or frame in self.remote_inputs:
+            return
+        self.remote_inputs[frame] = mask
+        while self.confirmed_frame + 1 in self.remote_inputs:
+            self.confirmed_frame += 1
+        if frame < self.sim.frame and self.predicted.get(frame) != mask:
+            if self.rollback_from is None or frame < self.rollback_from:
+                self.rollback_from = frame
+
+    def remote_input(self, frame):
+        mask = self.remote_inputs.get(frame)
+        if mask is None:
+            mask = self.remote_inputs.get(self.confirmed_frame, 0)
+        return mask
+
+    # --- SIMULATION ---
+    def _step(self, frame):
+        remote = self.remote_input(frame)
+        self.predicted[frame] = remote
+        masks = [0, 0]
+        masks[self.local_index] = self.local_inputs[frame]
+        masks[self.remote_index] = remote
+        self.snapshots.save(frame)
+        self.sim.step(masks)
+
+    def _rollback(self):
+        start = time.perf_counter()
+        first = self.rollback_from
+        target = self.sim.frame
+        self.rollback_from = None
+        self.snapshots.restore(first)
+        for frame in range(first, target):
+            self._step(frame)
+
+        elapsed = time.perf_counter() - start
+        self.rollbacks += 1
+        self.resimulated_frames += target - first
+        self.max_depth = max(self.max_depth, target - first)
+        self.resim_time += elapsed
+        self.max_resim_time = max(self.max_resim_time, elapsed)
+
+    def settle(self):
+        # Apply any pending correction without advancing
+        if self.rollback_from is not None:
+            self._rollback()
+        self._update_checksums()
+
+    def advance(self, local_mask):
+        # Simulate one frame with this local input; False if stalled waiting for the peer
+        self.settle()
+        if not self.can_advance():
+            self.stalls += 1
+            return False
+        self.local_inputs.append(local_mask)
+        self._step(self.sim.frame)
+        self._prune()
+        return True
+
+    def _prune(self):
+        oldest = self.sim.frame - self.max_rollback - 2
+        for frame in [f for f in self.predicted if f < oldest]:
+            del self.predicted[frame]
+        for frame in [f for f in self.remote_inputs if f < min(oldest, self.confirmed_frame)]:
+            del self.remote_inputs[frame]
+        # Checksums the peer never answered (lost packets) are dropped eventually
+        for table in (self.checksums, self.remote_checksums):
+            for frame in [f for f in table if f < self.checked_frame - 600]:
+                del table[frame]
+
+    # --- DESYNC DETECTION ---
+    def _update_checksums(self):
+        # A frame's starting state is final once every remote input before it is confirmed
+        last = min(self.confirmed_frame + 1, self.sim.frame - 1)
+        while self.checked_frame < last:
+            frame = self.checked_frame + 1
+            if self.rollback_from is not None and self.rollback_from < frame:
+                break
+            if frame % CHECKSUM_INTERVAL == 0:
+                checksum = self.snapshots.checksum(frame)
+                self.checksums[frame] = checksum
+                self.recent_checksums.append((frame, checksum))
+                self._compare_checksum(frame)
+            self.checked_frame = frame
+
+    def _compare_checksum(self, frame):
+        local = self.checksums.get(frame)
+        remote = self.remote_checksums.get(frame)
+        if local is None or remote is None:
+            return
+        if local != remote:
+            if self.desync_frame is None or frame < self.desync_frame:
+                self.desync_frame = frame
+        elif self.desync_frame is None:
+            self.last_matched_frame = max(self.last_matched_frame, frame)
+        del self.checksums[frame], self.remote_checksums[frame]
+
+    # --- PACKETS ---
+    def build_packet(self):
+        # Resend every input the peer has not acknowledged, so lost packets heal themselves
+        first = self.acked_frame + 1
+        inputs = bytes(self.local_inputs[first:first + MAX_INPUTS_PER_PACKET])
+        checksums = b"".join(CHECKSUM_ENTRY.pack(*entry) for entry in self.recent_checksums)
+        header = INPUT_PACKET.pack(first, self.confirmed_frame, len(inputs), len(self.recent_checksums))
+        return header + inputs + checksums
+
+    def receive_packet(self, data):
+        first, ack, count, checksum_count = INPUT_PACKET.unpack_from(data)
+        self.acked_frame = max(self.acked_frame, ack)
+        offset = INPUT_PACKET.size
+        for i, mask in enumerate(data[offset:offset + count]):
+            self.add_remote_input(first + i, mask)
+        offset += count
+        for _ in range(checksum_count):
+            frame, checksum = CHECKSUM_ENTRY.unpack_from(data, offset)
+            offset += CHECKSUM_ENTRY.size
+            if frame > self.last_matched_frame and frame not in self.remote_checksums:
+                self.remote_checksums[frame] = checksum
+                self._compare_checksum(frame)
+
+    def stats(self):
+        frames = max(self.sim.frame, 1)
+        return {
+            "frames": self.sim.frame,
+            "rollbacks": self.rollbacks,
+            "resimulated_frames": self.resimulated_frames,
+            "avg_rollback_depth": self.resimulated_frames / max(self.rollbacks, 1),
+            "max_rollback_depth": self.max_depth,
+            "resim_ms_per_frame": self.resim_time / frames * 1000,
+            "max_resim_ms": self.max_resim_time * 1000,
+            "stalls": self.stalls,
+            "desync_frame": self.desync_frame,
+            "last_matched_frame": self.last_matched_frame,
+        }
+
+
+# first input frame, ack frame, input count, checksum count; then one byte per
+# input and one CHECKSUM_ENTRY per checksum
+INPUT_PACKET = struct.Struct("<iiBB")
+CHECKSUM_ENTRY = struct.Struct("<iI")
+MAX_INPUTS_PER_PACKET = 120
+
+
+# --- TRANSPORT ---
+
+class LossyLink:
+    # UDP sender with artificial one-way latency, jitter and packet loss
+    def __init__(self, sock, address, latency=0.0, jitter=0.0, loss=0.0, seed=None):
+        self.sock = sock
+        self.address = address
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.rng = random.Random(seed)
+        self.queue = []
+        self.sequence = 0
+        self.sent = 0
+        self.dropped = 0
+
+    def send(self, data):
+        self.sent += 1
+        if self.loss and self.rng.random() < self.loss:
+            self.dropped += 1
+            return
+        delay = self.latency + self.rng.uniform(0, self.jitter)
+        if delay <= 0:
+            self._sendto(data)
+            return
+        self.sequence += 1
+        heapq.heappush(self.queue, (time.perf_counter() + delay, self.sequence, data))
+
+    def flush(self):
+        now = time.perf_counter()
+        while self.queue and self.queue[0][0] <= now:
+            self._sendto(heapq.heappop(self.queue)[2])
+
+    def _sendto(self, data):
+        try:
+            self.sock.sendto(data, self.address)
+        except OSError:
+            pass # Peer not listening yet; the next packet resends everything
+
+
+class UdpPeer:
+    def __init__(self, session, local_port, remote_address, latency=0.0, jitter=0.0, loss=0.0, seed=None):
+        self.session = session
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("0.0.0.0", local_port))
+        self.sock.setblocking(False)
+        self.link = LossyLink(self.sock, remote_address, latency, jitter, loss, seed)
+
+    def poll(self):
+        while True:
+            try:
+                data, _ = self.sock.recvfrom(2048)
+            except (BlockingIOError, ConnectionResetError):
+                break
+            self.session.receive_packet(data)
+        self.link.flush()
+
+    def send(self):
+        self.link.send(self.session.build_packet())
+        self.link.flush()
+
+    def close(self):
+        self.sock.close()
+
+
+def parse_address(text):
+    host, port = text.rsplit(":", 1)
+    return host, int(port)
+
+
+# --- LOCAL TWO-PROCESS HARNESS ---
+
+def run_peer(index, args, results):
+    from policies import make_policy
+
+    sim = Simulation(args.p1, args.p2, seed=args.seed)
+    session = RollbackSession(sim, index, args.max_rollback)
+    peer = UdpPeer(session, args.port + index, ("127.0.0.1", args.port + 1 - index),
+                   args.latency / 1000, args.jitter / 1000, args.loss, seed=args.seed * 2 + index)
+    policy = make_policy(args.policy, args.seed * 2 + index)
+
+    frame_time = 1.0 / 60
+    next_tick = time.perf_counter()
+    deadline = next_tick + args.frames / 60 * 4 + 10
+    done_at = None
+    while time.perf_counter() < deadline:
+        peer.poll()
+        if sim.frame < args.frames:
+            session.advance(policy(sim, index))
+        else:
+            session.settle()
+        peer.send()
+
+        finished = (sim.frame >= args.frames and session.confirmed_frame >= args.frames - 1
+                    and session.acked_frame >= args.frames - 1 and session.rollback_from is None)
+        if finished and done_at is None:
+            done_at = time.perf_counter()
+        if done_at is not None and time.perf_counter() - done_at > 0.5:
+            break # Linger briefly so the peer sees our final acks
+
+        next_tick += frame_time
+        time.sleep(max(0.0, next_tick - time.perf_counter()))
+
+    final = session.snapshots.new_buffer()
+    length = session.snapshots.save_to(final)
+    stats = session.stats()
+    stats["final_state"] = bytes(final[:length]).hex()
+    stats["packets_sent"] = peer.link.sent
+    stats["packets_dropped"] = peer.link.dropped
+    peer.close()
+    results.put((index, stats))
+
+def run_harness(args):
+    results = multiprocessing.Queue()
+    peers = [multiprocessing.Process(target=run_peer, args=(i, args, results)) for i in range(2)]
+    for p in peers:
+        p.start()
+    report = dict(results.get() for _ in peers)
+    for p in peers:
+        p.join()
+
+    print(f"{args.frames} frames, {args.latency:.0f} ms one-way latency (+{args.jitter:.0f} ms jitter), "
+          f"{args.loss:.0%} packet loss, max rollback {args.max_rollback}")
+    for index in sorted(report):
+        s = report[index]
+        print(f"P{index + 1}: frames {s['frames']}  rollbacks {s['rollbacks']}  "
+              f"depth avg {s['avg_rollback_depth']:.1f} max {s['max_rollback_depth']}  "
+              f"resim {s['resim_ms_per_frame']:.3f} ms/frame (worst {s['max_resim_ms']:.2f} ms)  "
+              f"stalls {s['stalls']}  packets {s['packets_sent']} sent / {s['packets_dropped']} dropped  "
+              f"desync {s['desync_frame']} (last verified frame {s['last_matched_frame']})")
+    in_sync = report[0]["final_state"] == report[1]["final_state"]
+    desynced = any(s["desync_frame"] is not None for s in report.values())
+    print("final state:", "identical" if in_sync else "DIFFERENT")
+    return 0 if in_sync and not desynced else 1
+
+def main():
+    parser = argparse.ArgumentParser(description="Run two rollback peers over localhost with a lossy link.")
+    parser.add_argument("--frames", type=int, default=1800)
+    parser.add_argument("--latency", type=float, default=50, help="one-way latency in ms")
+    parser.add_argument("--jitter", type=float, default=10, help="extra random delay in ms")
+    parser.add_argument("--loss", type=float, default=0.05, help="packet loss fraction")
+    parser.add_argument("--max-rollback", type=int, default=8)
+    parser.add_argument("--port", type=int, default=7400, help="P1 binds this port, P2 the next")
+    parser.add_argument("--p1", default="warrior")
+    parser.add_argument("--p2", default="ninja")
+    parser.add_argument("--policy", default="random")
+    parser.add_argument("--seed", type=int, default=0)
+    sys.exit(run_harness(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import random
+
+from simulation import BUTTONS, SIM_CONTROLS
+
+
+# --- INPUT POLICIES ---
+# A policy is called once per frame as policy(sim, index) and returns the
+# 7-bit input mask for player `index`.
+
+LEFT = 1 << SIM_CONTROLS["left"]
+RIGHT = 1 << SIM_CONTROLS["right"]
+JUMP = 1 << SIM_CONTROLS["jump"]
+DOWN = 1 << SIM_CONTROLS["down"]
+ATTACK1 = 1 << SIM_CONTROLS["attack1"]
+ATTACK2 = 1 << SIM_CONTROLS["attack2"]
+SPECIAL = 1 << SIM_CONTROLS["special"]
+
+
+class IdlePolicy:
+    def __init__(self, seed=None):
+        pass
+
+    def __call__(self, sim, index):
+        return 0
+
+
+class RandomPolicy:
+    # Mashes random buttons, holding each choice for a few frames like a person would
+    def __init__(self, seed=None, min_hold=4, max_hold=20):
+        self.rng = random.Random(seed)
+        self.min_hold = min_hold
+        self.max_hold = max_hold
+        self.mask = 0
+        self.hold = 0
+
+    def __call__(self, sim, index):
+        if self.hold <= 0:
+            self.mask = self.rng.randrange(1 << len(BUTTONS))
+            self.hold = self.rng.randint(self.min_hold, self.max_hold)
+        self.hold -= 1
+        return self.mask
+
+
+class ScriptedPolicy:
+    # Walks toward the opponent, recovers to the main stage and attacks in range
+    def __init__(self, seed=None, attack_range=90, aggression=0.6):
+        self.rng = random.Random(seed)
+        self.attack_range = attack_range
+        self.aggression = aggression
+        self.jump_held = False
+
+    def __call__(self, sim, index):
+        me = sim.characters[index]
+        foe = sim.characters[1 - index]
+        stage = sim.platforms[0].rect
+        mask = 0
+
+        # Recovery: off the main stage and falling, head back and jump
+        if me.x + me.w < stage.left or me.x > stage.right:
+            mask |= RIGHT if me.x < stage.centerx else LEFT
+            if me.vy > 0 and not self.jump_held:
+                mask |= JUMP
+            if me.y > stage.top:
+                mask |= SPECIAL
+            self.jump_held = bool(mask & JUMP)
+            return mask
+
+        dx = (foe.x + foe.w / 2) - (me.x + me.w / 2)
+        dy = (foe.y + foe.h / 2) - (me.y + me.h / 2)
+
+        if abs(dx) > self.attack_range * 0.6:
+            mask |= RIGHT if dx > 0 else LEFT
+        elif (dx > 0) != me.facing_right:
+            mask |= RIGHT if dx > 0 else LEFT
+
+        # Jump toward a higher opponent; drop through platforms toward a lower one
+        if dy < -60 and me.on_ground and not self.jump_held:
+            mask |= JUMP
+        elif dy > 60:
+            mask |= DOWN
+
+        if abs(dx) < self.attack_range and abs(dy) < 60:
+            if self.rng.random() < self.aggression:
+                mask |= ATTACK1 if self.rng.random() < 0.7 else SPECIAL
+        elif self.rng.random() < self.aggression * 0.1:
+            mask |= ATTACK2
+
+        self.jump_held = bool(mask & JUMP)
+        return mask
+
+
+def lookahead_policy(seed=None):
+    from ai import LookaheadPolicy # Imported here: ai takes its input masks from this module
+    return LookaheadPolicy(seed)
+
+
+POLICIES = {
+    "idle": IdlePolicy,
+    "random": RandomPolicy,
+    "scripted": ScriptedPolicy,
+    "lookahead": lookahead_policy, # ai.py; normal difficulty
+}
+
+# Policies that read the match rather than only their own seed; server bots
+# running them have to decode every state into a Simulation
+NEEDS_STATE = {"scripted", "lookahead"}
+
+def make_policy(name, seed=None):
+    return POLICIES[name](seed)
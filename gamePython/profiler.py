@@ -0,0 +1,125 @@
+import csv
+import json
+import os
+import time
+from collections import deque
+
+import pygame
+import runtime
+
+
+# --- FRAME PROFILER ---
+# Phase timing for the main loop. The loop calls mark(phase) after each piece
+# of work, and the time since the previous mark is charged to that phase, so
+# interleaved work (move/update for each fighter in turn) adds up correctly.
+# A frame runs from begin() to end_frame(). Only the last `window` frames are
+# kept, for rolling percentiles, the F3 overlay and CSV/JSON export. While
+# disabled, mark() returns straight away and Simulation.step skips it entirely.
+
+PHASES = ("events", "input", "move", "update", "projectiles", "attacks", "projectile_hits",
+          "select", "background", "entities", "hud", "overlay", "flip")
+OVERLAY_REFRESH = 30 # Frames between overlay text updates
+OVERLAY_POS = (10, 40)
+
+
+def percentile(ordered, p):
+    # Nearest-rank percentile of an ascending list
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+class FrameProfiler:
+    def __init__(self, window=3600):
+        self.enabled = False
+        self.visible = False # Overlay on screen
+        self.window = window
+        self.frames = deque(maxlen=window) # Per frame: {phase: ms}
+        self.current = {}
+        self.last = 0.0
+        self.frame_start = 0.0
+        self.overlay = None
+        self.overlay_age = 0
+
+    def __bool__(self):
+        return self.enabled
+
+    def begin(self):
+        if not self.enabled:
+            return
+        self.current = {}
+        self.last = self.frame_start = time.perf_counter()
+
+    def mark(self, phase):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        current = self.current
+        current[phase] = current.get(phase, 0.0) + (now - self.last) * 1e3
+        self.last = now
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        self.current["total"] = (time.perf_counter() - self.frame_start) * 1e3
+        self.frames.append(self.current)
+        self.current = {}
+        self.overlay_age += 1
+
+    def toggle_overlay(self):
+        # F3: showing the overlay also starts collecting
+        self.visible = not self.visible
+        self.enabled = self.enabled or self.visible
+        self.overlay = None
+
+    # --- STATISTICS ---
+    def summary(self):
+        # {phase: {"p50", "p95", "p99", "mean"}} in ms over the window, in loop order
+        stats = {}
+        for phase in PHASES + ("total",):
+            samples = sorted(frame.get(phase, 0.0) for frame in self.frames)
+            if not samples or not samples[-1]:
+                continue
+            stats[phase] = {"p50": percentile(samples, 50), "p95": percentile(samples, 95),
+                            "p99": percentile(samples, 99), "mean": sum(samples) / len(samples)}
+        return stats
+
+    def export(self, path):
+        # .json: percentiles plus every frame in the window; anything else: CSV, one row per frame
+        phases = [phase for phase in PHASES + ("total",) if any(phase in frame for frame in self.frames)]
+        if os.path.splitext(path)[1].lower() == ".json":
+            with open(path, "w") as f:
+                json.dump({"frames": len(self.frames), "summary": self.summary(),
+                           "samples": [[frame.get(phase, 0.0) for phase in phases] for frame in self.frames],
+                           "phases": phases}, f, indent=1)
+            return
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame"] + phases)
+            for i, frame in enumerate(self.frames):
+                writer.writerow([i] + [f"{frame.get(phase, 0.0):.4f}" for phase in phases])
+
+    # --- OVERLAY ---
+    def draw_overlay(self, screen):
+        # Returns the rect it covered; the text is re-rendered every OVERLAY_REFRESH frames
+        if self.overlay is None or self.overlay_age >= OVERLAY_REFRESH:
+            self.overlay = self.render_overlay()
+            self.overlay_age = 0
+        return screen.blit(self.overlay, OVERLAY_POS)
+
+    def render_overlay(self):
+        font = runtime.monospace_font # Columns line up
+        lines = [f"{'phase':<16}{'p50':>7}{'p95':>7}{'p99':>7}  ms"]
+        for phase, s in self.summary().items():
+            lines.append(f"{phase:<16}{s['p50']:>7.2f}{s['p95']:>7.2f}{s['p99']:>7.2f}")
+        rendered = [font.render(line, True, (255, 255, 255)) for line in lines]
+        height = font.get_linesize()
+        surface = pygame.Surface((max(r.get_width() for r in rendered) + 12, height * len(rendered) + 8))
+        surface.fill((0, 0, 0)) # Opaque, so each refresh fully covers the last one
+        for i, r in enumerate(rendered):
+            surface.blit(r, (6, 4 + i * height))
+        return surface
+
+
+# The main loop's profiler; main.py hands it to each Simulation as sim.profiler
+PROFILER = FrameProfiler()
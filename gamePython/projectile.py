@@ -1,92 +1,198 @@
+import json
+import os
 import pygame
-import math
 from constants import *
 
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+
+# --- PROJECTILE KINDS ---
+# Every projectile type is a definition in data/projectiles.json, looked up
+# once at spawn. Stats charged shots scale are listed under "charge": each
+# stat grows by int(charge_level / divisor). Sprites are lists of shape
+# layers drawn once per radius and then blitted.
+
+class ProjectileKind:
+    def __init__(self, name, index, radius, speed, damage, lifetime=100, gravity=0, shrink=0, min_radius=0,
+                 charge=None, sprite=()):
+        self.name = name
+        self.id = index # Stable one-byte id for snapshots and the network (file order)
+        self.radius = radius
+        self.speed = speed
+        self.damage = damage
+        self.lifetime = lifetime
+        self.gravity = gravity
+        self.shrink = shrink
+        self.min_radius = min_radius
+        self.charge = charge or {}
+        self.layers = sprite
+        self.sprites = {} # radius -> pre-rendered Surface
+
+    def sprite(self, radius):
+        surface = self.sprites.get(radius)
+        if surface is None:
+            surface = self.sprites[radius] = self.render(radius)
+        return surface
+
+    def render(self, radius):
+        # A 2r x 2r surface centred on the projectile, like the old inline drawing
+        size = max(1, radius * 2)
+        surface = pygame.Surface((size, size), pygame.SRCALPHA)
+        for layer in self.layers:
+            color = layer["color"]
+            color = globals()[color] if isinstance(color, str) else tuple(color)
+            dx, dy = layer.get("offset", (0, 0))
+            cx, cy = radius + dx, radius + dy
+            if layer["shape"] == "circle":
+                r = int(radius * layer.get("scale", 1)) - layer.get("inset", 0)
+                if r > 0:
+                    pygame.draw.circle(surface, color, (cx, cy), r)
+            elif layer["shape"] == "polygon":
+                points = [(cx + px * radius, cy + py * radius) for px, py in layer["points"]]
+                pygame.draw.polygon(surface, color, points, layer.get("width", 0))
+            elif layer["shape"] == "rect":
+                x, y, w, h = layer["rect"]
+                pygame.draw.rect(surface, color, (cx + x * radius, cy + y * radius, w * radius, h * radius))
+        if pygame.display.get_surface():
+            surface = surface.convert_alpha() # Match the screen format for faster blits
+        return surface
+
+
+def load_projectile_kinds(path=os.path.join(DATA_DIR, "projectiles.json")):
+    with open(path) as f:
+        definitions = json.load(f)
+    return {name: ProjectileKind(name, i, **fields) for i, (name, fields) in enumerate(definitions.items())}
+
+PROJECTILE_KINDS = load_projectile_kinds()
+
+
 class Projectile:
-    def __init__(self, x, y, direction, owner, projectile_type, **kwargs):
+    __slots__ = ("x", "y", "x_previous", "y_previous", "direction", "owner", "type", "kind", "active", "lifetime",
+                 "world_width", "world_height", "radius", "speed", "damage", "vy")
+    
+    def __init__(self, x, y, direction, owner, projectile_type, charge_level=1):
+        self.reset(x, y, direction, owner, projectile_type, charge_level)
+    
+    def reset(self, x, y, direction, owner, projectile_type, charge_level=1):
+        # Everything __init__ sets, so pooled objects can be reused
+        kind = PROJECTILE_KINDS[projectile_type]
         self.x = x
         self.y = y
+        self.x_previous = x
+        self.y_previous = y
         self.direction = direction
         self.owner = owner
         self.type = projectile_type
+        self.kind = kind
         self.active = True
-        self.lifetime = 100
+        self.lifetime = kind.lifetime
+        self.world_width = owner.world_width
+        self.world_height = owner.world_height
+        self.vy = 0
+        self.radius = kind.radius
+        self.speed = kind.speed
+        self.damage = kind.damage
         
-        if projectile_type == "fireball":
-            self.radius = 15
-            self.speed = 10
-            self.damage = 12
-        elif projectile_type == "ice_shard":
-            self.radius = 12
-            self.speed = 14
-            self.damage = 7
-            self.vy = 0
-        elif projectile_type == "missile":
-            self.radius = 8
-            self.speed = 16
-            self.damage = 6
-            self.lifetime = 40
-        elif projectile_type == "arcane_orb":
-            self.radius = 20
-            self.speed = 4
-            self.damage = 16
-            self.lifetime = 150
-        elif projectile_type == "charge_shot":
-            charge_level = kwargs.get("charge_level", 1)
-            self.radius = 10 + int(charge_level / 10)
-            self.speed = 12 + int(charge_level / 20)
-            self.damage = 8 + int(charge_level / 8)
-        elif projectile_type == "fire_breath":
-            self.radius = 25
-            self.speed = 3
-            self.damage = 14
-            self.lifetime = 25 # Short range
+        for stat, divisor in kind.charge.items():
+            setattr(self, stat, getattr(self, stat) + int(charge_level / divisor))
+    
+    def sleep(self):
+        # Far from every fighter: hold still but keep ageing, so it still expires
+        self.x_previous = self.x
+        self.y_previous = self.y
+        self.lifetime -= 1
+        if self.lifetime <= 0:
+            self.active = False
     
     def update(self):
+        # Same steps for every kind; the definition supplies the numbers
+        kind = self.kind
+        self.x_previous = self.x
+        self.y_previous = self.y
         self.x += self.speed * self.direction
-        if self.type == "ice_shard":
-            self.vy += 0.3
+        if kind.gravity:
+            self.vy += kind.gravity
             self.y += self.vy
         
-        if self.type == "fire_breath":
-            self.radius = max(5, self.radius - 1) # Shrinks
+        if kind.shrink:
+            self.radius = max(kind.min_radius, self.radius - kind.shrink)
         
         self.lifetime -= 1
-        if self.lifetime <= 0 or self.x < -50 or self.x > WIDTH + 50 or self.y > HEIGHT + 50:
+        if self.lifetime <= 0 or self.x < -50 or self.x > self.world_width + 50 or self.y > self.world_height + 50:
             self.active = False
     
     def draw(self, screen):
-        if self.type == "fireball":
-            pygame.draw.circle(screen, ORANGE, (int(self.x), int(self.y)), self.radius)
-            pygame.draw.circle(screen, YELLOW, (int(self.x), int(self.y)), self.radius - 5)
-            pygame.draw.circle(screen, RED, (int(self.x), int(self.y)), self.radius - 10)
-        elif self.type == "ice_shard":
-            points = [(self.x, self.y - self.radius), (self.x + self.radius/2, self.y),
-                      (self.x, self.y + self.radius), (self.x - self.radius/2, self.y)]
-            pygame.draw.polygon(screen, CYAN, points)
-            pygame.draw.polygon(screen, WHITE, points, 2)
-        elif self.type == "missile":
-            pygame.draw.circle(screen, YELLOW, (int(self.x), int(self.y)), self.radius)
-            pygame.draw.rect(screen, ORANGE, (self.x - self.radius, self.y - self.radius/2, self.radius*2, self.radius))
-        elif self.type == "arcane_orb":
-            pygame.draw.circle(screen, PURPLE, (int(self.x), int(self.y)), self.radius)
-            pygame.draw.circle(screen, PINK, (int(self.x), int(self.y)), self.radius - 4)
-            pygame.draw.circle(screen, WHITE, (int(self.x), int(self.y)), self.radius - 12)
-        elif self.type == "charge_shot":
-            pygame.draw.circle(screen, GREEN, (int(self.x), int(self.y)), self.radius)
-            pygame.draw.circle(screen, YELLOW, (int(self.x), int(self.y)), int(self.radius * 0.7))
-            pygame.draw.circle(screen, WHITE, (int(self.x), int(self.y)), int(self.radius * 0.3))
-        elif self.type == "fire_breath":
-            # Draw a cloud of fire particles
-            color1 = (255, 100, 0, 150) # Orange
-            color2 = (255, 255, 0, 100) # Yellow
-            
-            s = pygame.Surface((self.radius*2, self.radius*2), pygame.SRCALPHA)
-            pygame.draw.circle(s, color1, (self.radius, self.radius), self.radius)
-            pygame.draw.circle(s, color2, (self.radius+5, self.radius), int(self.radius/2))
-            pygame.draw.circle(s, color2, (self.radius-5, self.radius), int(self.radius/2))
-            screen.blit(s, (self.x - self.radius, self.y - self.radius))
+        radius = self.radius
+        screen.blit(self.kind.sprite(radius), (int(self.x) - radius, int(self.y) - radius))
     
     def get_rect(self):
         return pygame.Rect(self.x - self.radius, self.y - self.radius, 
-                          self.radius * 2, self.radius * 2)
\ No newline at end of file
+                          self.radius * 2, self.radius * 2)
+    
+    def draw_bounds(self):
+        # Exactly where draw() blits the sprite
+        radius = self.radius
+        return pygame.Rect(int(self.x) - radius, int(self.y) - radius, max(1, radius * 2), max(1, radius * 2))
+
+
+# --- POOL ---
+# The live projectiles, in spawn order, plus a free-list of spent ones.
+# spawn() reuses a spent object, so a steady stream of shots allocates nothing
+# once the pool has grown to its peak. Dead projectiles are swept out in one
+# stable pass per frame instead of list.remove() calls; keeping spawn order
+# (rather than swap-removing) keeps hit resolution, replays and rollback
+# exactly as before.
+
+class ProjectilePool(list):
+    __slots__ = ("free",)
+
+    def __init__(self, capacity=0):
+        super().__init__()
+        self.free = [Projectile.__new__(Projectile) for _ in range(capacity)]
+
+    def spawn(self, x, y, direction, owner, projectile_type, charge_level=1):
+        projectile = self.free.pop() if self.free else Projectile.__new__(Projectile)
+        projectile.reset(x, y, direction, owner, projectile_type, charge_level)
+        self.append(projectile)
+        return projectile
+
+    def update(self, characters=(), sleep_distance=0):
+        # With a sleep_distance, projectiles farther than that from every
+        # character (on either axis) sleep instead of moving. Whether one
+        # sleeps depends only on this frame's positions, so it is not extra
+        # state for snapshots, replays or rollback.
+        if sleep_distance:
+            centers = [(c.x + c.w / 2, c.y + c.h / 2) for c in characters]
+            for projectile in self:
+                x, y = projectile.x, projectile.y
+                for cx, cy in centers:
+                    if abs(x - cx) <= sleep_distance and abs(y - cy) <= sleep_distance:
+                        projectile.update()
+                        break
+                else:
+                    projectile.sleep()
+        else:
+            for projectile in self:
+                projectile.update()
+        self.sweep()
+
+    def sweep(self):
+        # Drop inactive projectiles, returning them to the free-list
+        keep = 0
+        free = self.free
+        for projectile in self:
+            if projectile.active:
+                self[keep] = projectile
+                keep += 1
+            else:
+                free.append(projectile)
+        del self[keep:]
+
+    def resize(self, count):
+        # Grow or shrink to count entries with recycled objects; the caller
+        # fills in every field (snapshot restore, network state)
+        free = self.free
+        while len(self) > count:
+            free.append(self.pop())
+        while len(self) < count:
+            self.append(free.pop() if free else Projectile.__new__(Projectile))
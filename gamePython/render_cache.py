@@ -0,0 +1,66 @@
+from collections import OrderedDict
+
+import pygame
+
+
+# --- SURFACE CACHES ---
+# Pre-rendered surfaces keyed by everything that decides their pixels (a
+# fighter's type, colour and facing; an effect's size and alpha). Colours are
+# part of the key, so a palette change simply misses and renders fresh
+# sprites while the stale ones age out; clear() drops them at once.
+
+def surface_bytes(surface):
+    return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+
+class LRUCache:
+    # Evicts the least recently used surfaces once their pixel memory passes max_bytes
+    def __init__(self, max_bytes=8 << 20):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, build, *args):
+        # The cached surface for key, calling build(*args) to render it on a miss
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = build(*args)
+        if pygame.display.get_surface():
+            # Match the screen format for fast blits; opaque and colour-keyed surfaces stay without alpha
+            surface = surface.convert_alpha() if surface.get_flags() & pygame.SRCALPHA else surface.convert()
+        self.entries[key] = surface
+        self.bytes += surface_bytes(surface)
+        while self.bytes > self.max_bytes and len(self.entries) > 1:
+            _, old = self.entries.popitem(last=False)
+            self.bytes -= surface_bytes(old)
+            self.evictions += 1
+        return surface
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+    def stats(self):
+        return {"entries": len(self.entries), "bytes": self.bytes, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions}
+
+
+# Fighter bodies and attack effects share one budget
+SPRITES = LRUCache()
+# Baked stage backgrounds (stages.Stage.background), one screen-sized surface each (a 1440p one is ~14 MB)
+STAGES = LRUCache(max_bytes=32 << 20)
+
+# Rendered strings: HUD counters, damage percents, names and menu labels
+TEXT = LRUCache(max_bytes=2 << 20)
+
+
+def render_text(font, text, color):
+    # font.render(text, True, color), rasterized once per (font, string, colour)
+    return TEXT.get((font, text, color), font.render, text, True, color)
@@ -0,0 +1,224 @@
+import argparse
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+
+from constants import DEFAULT_STAGE
+
+
+# --- REPLAY FILES ---
+# A replay is everything needed to re-run a match deterministically: the
+# match seed, both fighter types, the world size and one 7-bit input mask per
+# player per frame. Masks are stored planar (all of P1, then all of P2) and
+# zlib-compressed, since held buttons make long identical runs. Version 2
+# adds a state hash every CHECKPOINT_INTERVAL frames so playback can prove it
+# reproduced the recorded match. Version 3 adds the stage name; older
+# replays were all on the stadium.
+
+MAGIC = b"SMRP"
+VERSION = 3
+CHECKPOINT_INTERVAL = 60
+# magic, version, seed, world width, world height, frames, p1 type, p2 type
+HEADER = struct.Struct("<4sBQHHI8s8s")
+STAGE_FIELD = struct.Struct("<32s") # Follows HEADER from version 3
+
+
+class Replay:
+    def __init__(self, p1_type, p2_type, seed, width, height, inputs=None, checkpoints=None, stage=DEFAULT_STAGE):
+        self.p1_type = p1_type
+        self.p2_type = p2_type
+        self.seed = seed
+        self.width = width
+        self.height = height
+        self.stage = stage
+        self.inputs = inputs if inputs is not None else [bytearray(), bytearray()]
+        self.checkpoints = checkpoints if checkpoints is not None else array("I") # Hash after every CHECKPOINT_INTERVAL frames
+
+    @property
+    def frames(self):
+        return len(self.inputs[0])
+
+    @classmethod
+    def for_simulation(cls, sim):
+        p1, p2 = sim.characters
+        return cls(p1.type, p2.type, sim.rng.seed, sim.width, sim.height, stage=sim.stage.name)
+
+    def record(self, masks, sim=None):
+        # Call after sim.step(masks); passing the sim records checkpoint hashes
+        self.inputs[0].append(masks[0])
+        self.inputs[1].append(masks[1])
+        if sim is not None and sim.frame % CHECKPOINT_INTERVAL == 0:
+            self.checkpoints.append(sim.state_hash())
+
+    # --- ENCODING ---
+    def to_bytes(self):
+        header = HEADER.pack(MAGIC, VERSION, self.seed, self.width, self.height, self.frames,
+                             self.p1_type.encode(), self.p2_type.encode())
+        header += STAGE_FIELD.pack(self.stage.encode())
+        checkpoints = array("I", self.checkpoints)
+        if sys.byteorder == "big":
+            checkpoints.byteswap()
+        return header + zlib.compress(bytes(self.inputs[0] + self.inputs[1]) + checkpoints.tobytes(), 9)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, seed, width, height, frames, p1_type, p2_type = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("not a replay file")
+        if version not in (1, 2, VERSION):
+            raise ValueError(f"unsupported replay version {version}")
+        stage, size = DEFAULT_STAGE, HEADER.size
+        if version >= 3:
+            stage = STAGE_FIELD.unpack_from(data, size)[0].rstrip(b"\0").decode()
+            size += STAGE_FIELD.size
+        payload = zlib.decompress(data[size:])
+        if len(payload) < frames * 2:
+            raise ValueError("replay input stream is truncated")
+        inputs = [bytearray(payload[:frames]), bytearray(payload[frames:frames * 2])]
+        checkpoints = array("I", payload[frames * 2:]) # Empty for version 1
+        if sys.byteorder == "big":
+            checkpoints.byteswap()
+        return cls(p1_type.rstrip(b"\0").decode(), p2_type.rstrip(b"\0").decode(), seed, width, height,
+                   inputs, checkpoints, stage)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+    # --- PLAYBACK ---
+    def new_simulation(self):
+        from simulation import Simulation
+        return Simulation(self.p1_type, self.p2_type, self.width, self.height, seed=self.seed, stage=self.stage)
+
+    def frames_of_input(self):
+        return zip(self.inputs[0], self.inputs[1])
+
+    def play(self, sim=None):
+        # Re-run the whole match as fast as the CPU allows and return the final Simulation
+        sim = sim or self.new_simulation()
+        step = sim.step
+        for masks in self.frames_of_input():
+            step(masks)
+        return sim
+
+    def verify(self, hash_log=None, sim=None):
+        # Re-run the match and return the first frame whose state differs from
+        # the recording (None if it matches). Checkpoints narrow a desync to
+        # CHECKPOINT_INTERVAL frames; a per-frame HashLog pins the exact frame.
+        sim = sim or self.new_simulation()
+        for masks in self.frames_of_input():
+            sim.step(masks)
+            frame = sim.frame
+            if hash_log is not None and frame <= len(hash_log.hashes):
+                if sim.state_hash() != hash_log.hashes[frame - 1]:
+                    return frame
+            elif frame % CHECKPOINT_INTERVAL == 0 and frame // CHECKPOINT_INTERVAL <= len(self.checkpoints):
+                if sim.state_hash() != self.checkpoints[frame // CHECKPOINT_INTERVAL - 1]:
+                    return frame
+        return None
+
+
+# --- PER-FRAME HASH LOGS ---
+
+class HashLog:
+    # One state hash per simulated frame (hashes[n - 1] is the state after n frames)
+    def __init__(self, hashes=None):
+        self.hashes = hashes if hashes is not None else array("I")
+
+    def record(self, sim):
+        self.hashes.append(sim.state_hash())
+
+    def save(self, path):
+        hashes = array("I", self.hashes)
+        if sys.byteorder == "big":
+            hashes.byteswap()
+        with open(path, "wb") as f:
+            hashes.tofile(f)
+
+    @classmethod
+    def load(cls, path):
+        hashes = array("I")
+        with open(path, "rb") as f:
+            hashes.frombytes(f.read())
+        if sys.byteorder == "big":
+            hashes.byteswap()
+        return cls(hashes)
+
+    def first_divergence(self, other):
+        # First frame number where the two logs disagree, or None
+        for frame, (a, b) in enumerate(zip(self.hashes, other.hashes), 1):
+            if a != b:
+                return frame
+        return None
+
+
+# --- COMMAND LINE ---
+
+def play_rendered(replay, speed=1.0):
+    # Real-time playback through the game's own fight renderer
+    import pygame
+    import runtime
+    from constants import FPS
+    from main import draw_fight_screen
+    from camera import Camera
+
+    sim = replay.new_simulation()
+    camera = Camera(sim.width, sim.height, runtime.WIDTH, runtime.HEIGHT, sim.stage.max_zoom)
+    for masks in replay.frames_of_input():
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                return sim
+        sim.step(masks)
+        camera.follow(sim.characters, 1 / (FPS * speed))
+        draw_fight_screen(runtime.screen, sim, camera=camera)
+        pygame.display.flip()
+        runtime.clock.tick(FPS * speed)
+    return sim
+
+def main():
+    parser = argparse.ArgumentParser(description="Play back a recorded match.")
+    parser.add_argument("path")
+    parser.add_argument("--render", action="store_true", help="show the match in the game window")
+    parser.add_argument("--speed", type=float, default=1.0, help="playback speed multiplier with --render")
+    parser.add_argument("--verify", action="store_true", help="check the re-run against the recorded state hashes")
+    parser.add_argument("--hash-log", metavar="PATH", help="per-frame hash log from the live match, for --verify")
+    args = parser.parse_args()
+
+    replay = Replay.load(args.path)
+    size = os.path.getsize(args.path)
+    print(f"{replay.p1_type} vs {replay.p2_type} on {replay.stage}, seed {replay.seed}, {replay.frames} frames "
+          f"({replay.frames / 60:.1f}s), {size} bytes")
+
+    if args.verify:
+        hash_log = HashLog.load(args.hash_log) if args.hash_log else None
+        desync = replay.verify(hash_log)
+        if desync is None:
+            print("verified: playback matches the recorded match")
+        else:
+            exact = "exactly" if hash_log else f"within the {CHECKPOINT_INTERVAL} frames up to"
+            print(f"DESYNC: state differs {exact} frame {desync}")
+        sys.exit(0 if desync is None else 1)
+
+    if args.render:
+        start = time.perf_counter()
+        sim = play_rendered(replay, args.speed)
+    else:
+        sim = replay.new_simulation()
+        start = time.perf_counter()
+        replay.play(sim)
+    elapsed = time.perf_counter() - start
+
+    winner = f"P{sim.characters.index(sim.winner) + 1} ({sim.winner.name})" if sim.winner else "none"
+    stocks = ", ".join(str(c.stock) for c in sim.characters)
+    print(f"winner: {winner}, stocks {stocks}, played {sim.frame} frames in {elapsed:.3f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import os
+
+
+# --- PER-MATCH RANDOM NUMBERS ---
+# SplitMix64: the whole generator state is one 64-bit integer, so snapshots
+# can save and restore it as a single field.
+
+MASK64 = (1 << 64) - 1
+
+
+class MatchRandom:
+    def __init__(self, seed=None):
+        if seed is None:
+            seed = int.from_bytes(os.urandom(8), "little")
+        self.seed = seed & MASK64
+        self.state = self.seed
+
+    def next64(self):
+        self.state = (self.state + 0x9E3779B97F4A7C15) & MASK64
+        z = self.state
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+        return z ^ (z >> 31)
+
+    def randint(self, a, b):
+        return a + self.next64() % (b - a + 1)
+
+    def random(self):
+        return (self.next64() >> 11) * (1.0 / (1 << 53))
+
+    def getstate(self):
+        return self.state
+
+    def setstate(self, state):
+        self.state = state
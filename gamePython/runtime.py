@@ -0,0 +1,49 @@
+import pygame
+
+
+# --- RUNTIME CONTEXT ---
+# The window, frame clock and fonts, each created the first time something
+# reads it (runtime.screen, runtime.font, ...). Importing this module starts
+# nothing, so a tool pays only for what it touches: the simulation, replay
+# checks and the server never initialize SDL video or fonts, and the game
+# skips pygame.init()'s audio and joystick setup. A created value is stored
+# as an ordinary module global, so later reads are plain attribute lookups.
+
+CAPTION = "Smash Bros Ultimate - Pygame"
+
+
+def _screen():
+    pygame.display.init()
+    screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+    pygame.display.set_caption(CAPTION)
+    return screen
+
+def _font(size):
+    pygame.font.init()
+    return pygame.font.Font(None, size)
+
+def _monospace_font():
+    pygame.font.init()
+    return pygame.font.SysFont("monospace", 15)
+
+_FACTORIES = {
+    "screen": _screen,
+    "WIDTH": lambda: __getattr__("screen").get_width(), # The game's world is its window
+    "HEIGHT": lambda: __getattr__("screen").get_height(),
+    "clock": pygame.time.Clock,
+    "font": lambda: _font(36),
+    "small_font": lambda: _font(24),
+    "title_font": lambda: _font(72),
+    "monospace_font": _monospace_font,
+}
+
+
+def __getattr__(name):
+    # Only called for names not created yet
+    if name in globals():
+        return globals()[name]
+    factory = _FACTORIES.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = globals()[name] = factory()
+    return value
@@ -0,0 +1,443 @@
+import argparse
+import asyncio
+import math
+import multiprocessing
+import struct
+import sys
+import time
+from collections import deque
+
+from simulation import Simulation
+import netcodec
+from policies import POLICIES, NEEDS_STATE, make_policy
+from tournament import CHAR_LIST
+
+TICK_RATE = 60
+MAX_CATCH_UP = 5 # Ticks run back to back after a stall before the schedule skips ahead
+ROOM_TIMEOUT = 10.0 # Seconds without a packet before a player's room is closed
+MAX_MATCH_FRAMES = 60 * 60 * 8
+STATE_HISTORY = 32 # Frames of sent states kept as delta baselines (about half a second)
+
+
+# --- PROTOCOL ---
+# One UDP socket serves every room. Each datagram starts with a message type
+# byte. Clients send JOIN once (resent until WELCOME arrives), then one INPUT
+# per frame that also acknowledges the newest STATE they decoded. The server
+# answers with a STATE every tick, delta-encoded by netcodec against the
+# client's acknowledged state, and END when the match is over.
+
+JOIN, WELCOME, INPUT, STATE, END, LEAVE = range(6)
+JOIN_MSG = struct.Struct("<B8s") # type, fighter type
+WELCOME_MSG = struct.Struct("<BIBQHH8s8s") # type, room id, player index, seed, world width, world height, p1 type, p2 type
+INPUT_MSG = struct.Struct("<BiiB") # type, client frame, acked state frame (-1 for none), input mask
+STATE_MSG = struct.Struct("<BI") # type, server frame; then the netcodec payload
+END_MSG = struct.Struct("<Bb") # type, winner index (-1 for none)
+
+
+# --- ROOMS ---
+
+class Room:
+    def __init__(self, room_id, players, seed, width, height, max_frames=MAX_MATCH_FRAMES):
+        self.id = room_id
+        self.addresses = [address for address, _ in players]
+        self.sim = Simulation(players[0][1], players[1][1], width, height, seed=seed)
+        self.max_frames = max_frames
+        self.masks = [0, 0]
+        self.input_frames = [-1, -1]
+        self.acks = [-1, -1]
+        self.last_heard = [time.monotonic()] * 2
+        self.history = {} # frame -> quantized state sent for that frame
+
+    def welcome(self, index):
+        sim = self.sim
+        p1, p2 = sim.characters
+        return WELCOME_MSG.pack(WELCOME, self.id, index, sim.rng.seed, sim.width, sim.height,
+                                p1.type.encode(), p2.type.encode())
+
+    def set_input(self, index, frame, ack, mask):
+        # Latest input wins; reordered older datagrams are ignored
+        self.last_heard[index] = time.monotonic()
+        if frame > self.input_frames[index]:
+            self.input_frames[index] = frame
+            self.masks[index] = mask & 0x7F
+        if ack > self.acks[index]:
+            self.acks[index] = ack
+
+    @property
+    def over(self):
+        return self.sim.over or self.sim.frame >= self.max_frames
+
+    def state_packets(self):
+        # One packet per player, each against that player's acked state; both
+        # usually ack the same frame, so the encoding is shared when they do
+        frame = self.sim.frame
+        state = netcodec.quantize(self.sim)
+        history = self.history
+        history[frame] = state
+        history.pop(frame - STATE_HISTORY, None)
+        header = STATE_MSG.pack(STATE, frame)
+        packets = {}
+        for ack in self.acks:
+            if ack not in packets:
+                base = history.get(ack)
+                packets[ack] = header + (netcodec.encode(state, base, frame - ack) if base else netcodec.encode(state))
+        return [packets[ack] for ack in self.acks]
+
+    def end_packet(self):
+        sim = self.sim
+        return END_MSG.pack(END, sim.characters.index(sim.winner) if sim.winner else -1)
+
+
+# --- TICK METRICS ---
+
+class TickStats:
+    # Lateness is how far past its deadline a tick started (scheduler jitter);
+    # work is how long stepping and sending every room took. A tick overruns
+    # when it finishes after the next tick's deadline.
+    def __init__(self, period, window=TICK_RATE * 10):
+        self.period = period
+        self.lateness = deque(maxlen=window)
+        self.work = deque(maxlen=window)
+        self.ticks = 0
+        self.overruns = 0
+        self.skipped = 0
+
+    def record(self, lateness, work):
+        self.ticks += 1
+        self.lateness.append(lateness)
+        self.work.append(work)
+        if lateness + work > self.period:
+            self.overruns += 1
+
+    def summary(self):
+        lateness = sorted(self.lateness) or [0.0]
+        work = sorted(self.work) or [0.0]
+        pick = lambda values, q: values[min(len(values) - 1, int(q * len(values)))] * 1000
+        return {
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "skipped_ticks": self.skipped,
+            "jitter_p50_ms": pick(lateness, 0.5),
+            "jitter_p99_ms": pick(lateness, 0.99),
+            "jitter_max_ms": lateness[-1] * 1000,
+            "work_p50_ms": pick(work, 0.5),
+            "work_p99_ms": pick(work, 0.99),
+            "work_max_ms": work[-1] * 1000,
+            "budget_ms": self.period * 1000,
+        }
+
+
+# --- SERVER ---
+
+class MatchServer(asyncio.DatagramProtocol):
+    def __init__(self, width=1280, height=720, seed=0, max_frames=MAX_MATCH_FRAMES, report_every=5.0):
+        self.width = width
+        self.height = height
+        self.seed = seed
+        self.max_frames = max_frames
+        self.report_every = report_every
+        self.rooms = {}
+        self.players = {} # address -> (room, player index)
+        self.waiting = [] # (address, fighter type) not yet paired
+        self.next_room_id = 0
+        self.rooms_finished = 0
+        self.states_sent = 0
+        self.state_bytes = 0
+        self.peak_rooms = 0
+        self.transport = None
+        self.stats = TickStats(1.0 / TICK_RATE)
+        self.running = True
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, address):
+        if not data:
+            return
+        kind = data[0]
+        if kind == INPUT and len(data) >= INPUT_MSG.size:
+            seat = self.players.get(address)
+            if seat:
+                _, frame, ack, mask = INPUT_MSG.unpack_from(data)
+                seat[0].set_input(seat[1], frame, ack, mask)
+            else:
+                self.transport.sendto(END_MSG.pack(END, -1), address) # Room is gone; the END was lost
+        elif kind == JOIN and len(data) >= JOIN_MSG.size:
+            self.join(address, JOIN_MSG.unpack_from(data)[1].rstrip(b"\0").decode(errors="replace"))
+        elif kind == LEAVE:
+            seat = self.players.get(address)
+            if seat:
+                self.close_room(seat[0])
+            self.waiting = [w for w in self.waiting if w[0] != address]
+
+    def join(self, address, char_type):
+        seat = self.players.get(address)
+        if seat:
+            self.transport.sendto(seat[0].welcome(seat[1]), address) # Our WELCOME was lost
+            return
+        if char_type not in CHAR_LIST:
+            return
+        if any(w[0] == address for w in self.waiting):
+            return
+        self.waiting.append((address, char_type))
+        if len(self.waiting) >= 2:
+            players, self.waiting = self.waiting[:2], self.waiting[2:]
+            self.open_room(players)
+
+    def open_room(self, players):
+        room = Room(self.next_room_id, players, self.seed + self.next_room_id, self.width, self.height,
+                    self.max_frames)
+        self.next_room_id += 1
+        self.rooms[room.id] = room
+        self.peak_rooms = max(self.peak_rooms, len(self.rooms))
+        for index, address in enumerate(room.addresses):
+            self.players[address] = (room, index)
+            self.transport.sendto(room.welcome(index), address)
+
+    def close_room(self, room):
+        if self.rooms.pop(room.id, None) is None:
+            return
+        self.rooms_finished += 1
+        packet = room.end_packet()
+        for address in room.addresses:
+            self.players.pop(address, None)
+            self.transport.sendto(packet, address)
+
+    def tick(self):
+        sendto = self.transport.sendto
+        finished = []
+        for room in self.rooms.values():
+            room.sim.step(room.masks)
+            for packet, address in zip(room.state_packets(), room.addresses):
+                sendto(packet, address)
+                self.state_bytes += len(packet)
+            self.states_sent += 2
+            if room.over:
+                finished.append(room)
+        for room in finished:
+            self.close_room(room)
+
+    def drop_silent_rooms(self):
+        cutoff = time.monotonic() - ROOM_TIMEOUT
+        for room in [r for r in self.rooms.values() if min(r.last_heard) < cutoff]:
+            self.close_room(room)
+
+    # --- TICK SCHEDULER ---
+    async def run(self, duration=None):
+        # Every tick has an absolute deadline start + n * period, so sleep
+        # overshoot never accumulates into drift. A late tick runs at once and
+        # the next ones catch up back to back; after a stall longer than
+        # MAX_CATCH_UP ticks the missed ticks are skipped instead.
+        loop = asyncio.get_running_loop()
+        period = 1.0 / TICK_RATE
+        start = loop.time()
+        next_report = start + self.report_every
+        next_sweep = start + 1.0
+        tick = 0
+        while self.running and (duration is None or tick * period < duration):
+            deadline = start + tick * period
+            delay = deadline - loop.time()
+            # Always yield so datagrams queued during the last tick are read
+            await asyncio.sleep(max(delay, 0.0))
+
+            now = loop.time()
+            lateness = now - deadline
+            if lateness > MAX_CATCH_UP * period:
+                missed = int(lateness / period)
+                self.stats.skipped += missed
+                tick += missed
+                deadline = start + tick * period
+                lateness = now - deadline
+
+            began = time.perf_counter()
+            self.tick()
+            self.stats.record(lateness, time.perf_counter() - began)
+            tick += 1
+
+            if now >= next_sweep:
+                self.drop_silent_rooms()
+                next_sweep += 1.0
+            if self.report_every and now >= next_report:
+                self.print_report()
+                next_report += self.report_every
+
+    def print_report(self):
+        s = self.stats.summary()
+        print(f"rooms {len(self.rooms)} (peak {self.peak_rooms}, finished {self.rooms_finished})  "
+              f"waiting {len(self.waiting)}  ticks {s['ticks']}  overruns {s['overruns']}  "
+              f"skipped {s['skipped_ticks']}  jitter p50 {s['jitter_p50_ms']:.2f} p99 {s['jitter_p99_ms']:.2f} "
+              f"max {s['jitter_max_ms']:.2f} ms  work p50 {s['work_p50_ms']:.2f} p99 {s['work_p99_ms']:.2f} "
+              f"max {s['work_max_ms']:.2f} ms of {s['budget_ms']:.1f}", flush=True)
+
+async def serve(host, port, duration=None, **options):
+    loop = asyncio.get_running_loop()
+    transport, server = await loop.create_datagram_endpoint(lambda: MatchServer(**options), local_addr=(host, port))
+    try:
+        await server.run(duration)
+    finally:
+        transport.close()
+    return server
+
+
+# --- LOCAL TEST CLIENTS ---
+
+class BotClient(asyncio.DatagramProtocol):
+    # Headless player: joins, decodes and acks every STATE, answers with one
+    # input per frame and queues again when a match ends. With decode set it
+    # also applies each state to its own Simulation (needed by policies that
+    # look at the match, e.g. scripted); without it the bot is cheap enough
+    # to run hundreds beside the server on one machine.
+    def __init__(self, char_type, policy, seed, decode=True):
+        self.char_type = char_type
+        self.policy_name = policy
+        self.seed = seed
+        self.decode = decode
+        self.transport = None
+        self.in_match = False
+        self.sim = None
+        self.history = {} # frame -> decoded state, baselines for later deltas
+        self.acked = -1
+        self.index = 0
+        self.policy = None
+        self.frame = 0
+        self.states = 0
+        self.state_bytes = 0
+        self.matches = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, address):
+        kind = data[0]
+        if kind == STATE and self.in_match:
+            _, frame = STATE_MSG.unpack_from(data)
+            distance = netcodec.base_distance(data, STATE_MSG.size)
+            base = self.history.get(frame - distance) if distance else None
+            if distance and base is None:
+                return # Baseline already pruned; a later packet will use a newer ack
+            state = netcodec.decode(data, 2, base, STATE_MSG.size)
+            self.history[frame] = state
+            self.history.pop(frame - STATE_HISTORY, None)
+            self.states += 1
+            self.state_bytes += len(data)
+            if frame > self.acked:
+                self.acked = frame
+                if self.decode:
+                    netcodec.apply_state(self.sim, state)
+        elif kind == WELCOME and not self.in_match:
+            _, room_id, self.index, seed, width, height, p1, p2 = WELCOME_MSG.unpack(data)
+            if self.decode:
+                self.sim = Simulation(p1.rstrip(b"\0").decode(), p2.rstrip(b"\0").decode(), width, height, seed=seed)
+            self.policy = make_policy(self.policy_name, self.seed * 2 + self.index)
+            self.history.clear()
+            self.acked = -1
+            self.in_match = True
+        elif kind == END and self.in_match:
+            self.in_match = False
+            self.sim = None
+            self.matches += 1
+
+    def tick(self):
+        if not self.in_match:
+            self.transport.sendto(JOIN_MSG.pack(JOIN, self.char_type.encode()))
+            return
+        self.frame += 1
+        self.transport.sendto(INPUT_MSG.pack(INPUT, self.frame, self.acked, self.policy(self.sim, self.index)))
+
+    def leave(self):
+        self.transport.sendto(bytes([LEAVE]))
+
+async def run_bots(address, count, seconds, char_types, policy, seed, decode):
+    loop = asyncio.get_running_loop()
+    bots = []
+    for i in range(count):
+        bot = BotClient(char_types[i % len(char_types)], policy, seed + i, decode)
+        await loop.create_datagram_endpoint(lambda: bot, remote_addr=address)
+        bots.append(bot)
+
+    period = 1.0 / TICK_RATE
+    start = loop.time()
+    tick = 0
+    while tick * period < seconds:
+        await asyncio.sleep(max(start + tick * period - loop.time(), 0.0))
+        for bot in bots:
+            bot.tick()
+        tick += 1
+    for bot in bots:
+        bot.leave()
+    await asyncio.sleep(0.1)
+    for bot in bots:
+        bot.transport.close()
+    return sum(b.states for b in bots), sum(b.state_bytes for b in bots), sum(b.matches for b in bots)
+
+def bot_process(address, count, seconds, char_types, policy, seed, decode, results):
+    results.put(asyncio.run(run_bots(address, count, seconds, char_types, policy, seed, decode)))
+
+
+# --- LOAD TEST ---
+
+def load_test(args):
+    # Server on this process's event loop; bots in separate processes so they
+    # do not share the server's core
+    bots = args.rooms * 2
+    procs = max(1, math.ceil(bots / args.bots_per_process))
+    results = multiprocessing.Queue()
+    workers = []
+    for p in range(procs):
+        count = bots // procs + (1 if p < bots % procs else 0)
+        workers.append(multiprocessing.Process(
+            target=bot_process,
+            args=(("127.0.0.1", args.port), count, args.seconds, args.chars, args.policy,
+                  args.seed + p * 100000, args.decode or args.policy in NEEDS_STATE, results)))
+    for w in workers:
+        w.start()
+
+    server = asyncio.run(serve("127.0.0.1", args.port, args.seconds + 1.0, seed=args.seed,
+                               max_frames=args.max_frames, report_every=args.report))
+    states = state_bytes = matches = 0
+    for _ in workers:
+        s, b, m = results.get()
+        states += s
+        state_bytes += b
+        matches += m
+    for w in workers:
+        w.join()
+
+    s = server.stats.summary()
+    print(f"{bots} bots in {procs} processes, {args.seconds:.0f}s: peak {server.peak_rooms} rooms, "
+          f"{server.rooms_finished} finished, {matches} match ends seen by clients")
+    print(f"ticks {s['ticks']}  overruns {s['overruns']}  skipped {s['skipped_ticks']}  "
+          f"jitter p50 {s['jitter_p50_ms']:.2f} p99 {s['jitter_p99_ms']:.2f} max {s['jitter_max_ms']:.2f} ms  "
+          f"work p50 {s['work_p50_ms']:.2f} p99 {s['work_p99_ms']:.2f} max {s['work_max_ms']:.2f} ms "
+          f"of {s['budget_ms']:.1f}")
+    print(f"states delivered {states} ({states / max(1, bots * args.seconds * TICK_RATE):.1%} of one per bot per tick), "
+          f"{state_bytes / max(1, states):.1f} bytes each incl. headers "
+          f"(server sent {server.state_bytes / max(1, server.states_sent):.1f} on average)")
+    return 0 if s["skipped_ticks"] == 0 else 1
+
+def main():
+    parser = argparse.ArgumentParser(description="Authoritative match server: many 1v1 rooms on one event loop.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=7500)
+    parser.add_argument("--seed", type=int, default=0, help="room n plays with seed + n")
+    parser.add_argument("--max-frames", type=int, default=MAX_MATCH_FRAMES, help="frame limit per match")
+    parser.add_argument("--report", type=float, default=5.0, help="seconds between metric reports")
+    parser.add_argument("--load-test", action="store_true", help="run against local bot clients and exit")
+    parser.add_argument("--rooms", type=int, default=200, help="concurrent rooms for --load-test")
+    parser.add_argument("--seconds", type=float, default=20.0, help="--load-test duration")
+    parser.add_argument("--bots-per-process", type=int, default=400)
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="random", help="bot input policy (scripted and lookahead imply --decode)")
+    parser.add_argument("--decode", action="store_true", help="bots decode every state (scripted and lookahead need it)")
+    parser.add_argument("--chars", nargs="+", choices=CHAR_LIST, default=CHAR_LIST, help="bot fighters")
+    args = parser.parse_args()
+
+    if args.load_test:
+        sys.exit(load_test(args))
+    try:
+        asyncio.run(serve(args.host, args.port, seed=args.seed, max_frames=args.max_frames,
+                          report_every=args.report))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
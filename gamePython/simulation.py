@@ -0,0 +1,137 @@
+from constants import *
+from character import Character
+from projectile import ProjectilePool
+from moves import HIT_DAMAGE
+from rng import MatchRandom
+from snapshot import StateHasher
+from broadphase import HitGrid
+from stages import Stage, load_stage
+
+
+# --- INPUTS ---
+# Each player's input for one frame is a 7-bit mask, one bit per button.
+BUTTONS = ("left", "right", "jump", "down", "attack1", "attack2", "special")
+SIM_CONTROLS = {name: i for i, name in enumerate(BUTTONS)}
+ATTACK2_BIT = 1 << SIM_CONTROLS["attack2"]
+
+# Every possible mask decoded once, so per-frame lookups never allocate
+_MASK_KEYS = [tuple(bool(mask >> i & 1) for i in range(len(BUTTONS)))
+              for mask in range(1 << len(BUTTONS))]
+
+def keys_from_mask(mask):
+    return _MASK_KEYS[mask]
+
+def mask_from_keys(keys, controls):
+    mask = 0
+    for i, name in enumerate(BUTTONS):
+        if keys[controls[name]]:
+            mask |= 1 << i
+    return mask
+
+
+# --- COMBAT ---
+
+def resolve_attacks(characters, hit_grid):
+    rects = hit_grid.rects
+    for i, attacker in enumerate(characters):
+        if attacker.is_attacking and attacker.attack_hitbox:
+            for j in hit_grid.query(attacker.attack_hitbox):
+                victim = characters[j]
+                if i != j and attacker.attack_hitbox.colliderect(rects[j]):
+                    if victim.hitstun == 0:
+                        dmg, stun_multiplier = HIT_DAMAGE[attacker.current_attack_name] # data/moves.json
+                        victim.take_damage(dmg, attacker.x, attacker.y, stun_multiplier) # Pass the multiplier
+                        attacker.damage_dealt += dmg
+
+                        # Attack now finishes based on attack_frame timer
+
+def resolve_projectile_hits(characters, projectiles, hit_grid):
+    rects = hit_grid.rects
+    hit = False
+    for projectile in projectiles:
+        rect = projectile.get_rect()
+        for j in hit_grid.query(rect):
+            char = characters[j]
+            if char != projectile.owner and rect.colliderect(rects[j]):
+                if char.hitstun == 0:
+                    char.take_damage(projectile.damage, projectile.x, projectile.y)
+                    projectile.owner.damage_dealt += projectile.damage
+                    projectile.active = False
+                    hit = True
+                    break
+    if hit:
+        projectiles.sweep()
+
+
+# --- SIMULATION ---
+
+class Simulation:
+    # One 1v1 match with no window, fonts or frame clock. Call step() once per
+    # frame with a 7-bit input mask per player.
+    def __init__(self, p1_type, p2_type, width=WIDTH, height=HEIGHT, colors=(RED, BLUE), seed=None,
+                 stage=DEFAULT_STAGE):
+        self.rng = MatchRandom(seed)
+        # A stage name from data/stages, or an already laid out Stage; either way nothing is recomputed per frame
+        self.stage = stage if isinstance(stage, Stage) else load_stage(stage, width, height)
+        self.width = self.stage.width # The world; a stage with its own size ignores width and height
+        self.height = self.stage.height
+        self.platforms = self.stage.platforms
+        self.stage_index = self.stage.index
+        self.hit_grid = HitGrid()
+        self.characters = []
+        for char_type, color, (x, y) in zip((p1_type, p2_type), colors, self.stage.spawns):
+            char = Character(x, y, color, SIM_CONTROLS, char_type)
+            char.world_width = self.width
+            char.world_height = self.height
+            char.blast_zone = self.stage.blast_zone
+            char.rng = self.rng
+            self.characters.append(char)
+        self.projectiles = ProjectilePool()
+        self.prev_masks = (0,) * len(self.characters)
+        self.frame = 0
+        self.winner = None
+        self.state_hash = StateHasher(self) # sim.state_hash() -> CRC of the state after self.frame frames
+        self.profiler = None # A profiler.FrameProfiler to time each phase of step()
+
+    @property
+    def over(self):
+        return self.winner is not None or not any(c.stock > 0 for c in self.characters)
+
+    def step(self, masks):
+        characters = self.characters
+        projectiles = self.projectiles
+        profiler = self.profiler
+        if profiler: profiler.mark("input") # Whatever the caller did since its last mark
+
+        # Hunter fires its charge shot when attack2 is released
+        for char, mask, prev in zip(characters, masks, self.prev_masks):
+            if char.type == 'hunter' and prev & ATTACK2_BIT and not mask & ATTACK2_BIT:
+                char.fire_charge_shot(projectiles)
+
+        for char, mask in zip(characters, masks):
+            keys = _MASK_KEYS[mask]
+            char.move(keys, projectiles)
+            if profiler: profiler.mark("move")
+            char.update(self.platforms, keys, self.stage_index)
+            if profiler: profiler.mark("update")
+
+        projectiles.update(characters, self.stage.sleep_distance)
+        if profiler: profiler.mark("projectiles")
+        self.hit_grid.rebuild(characters) # Nobody moves again until next frame
+        resolve_attacks(characters, self.hit_grid)
+        if profiler: profiler.mark("attacks")
+        resolve_projectile_hits(characters, projectiles, self.hit_grid)
+        if profiler: profiler.mark("projectile_hits")
+
+        alive_players = [c for c in characters if c.stock > 0]
+        if len(alive_players) == 1:
+            self.winner = alive_players[0]
+
+        self.prev_masks = tuple(masks)
+        self.frame += 1
+
+    def run(self, policies, max_frames=60 * 60 * 5):
+        # policies: one callable per player, policy(sim, index) -> input mask
+        while not self.over and self.frame < max_frames:
+            self.step([policy(self, i) for i, policy in enumerate(policies)])
+        return self.winner
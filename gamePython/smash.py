@@ -1,8 +1,7 @@
 import pygame
 import math
 import random
-
-pygame.init()
+import runtime
 
 # Constants
 FPS = 60
@@ -23,15 +22,17 @@ PURPLE = (200, 100, 255)
 CYAN = (100, 255, 255)
 PINK = (255, 100, 200)
 
-# Fullscreen Setup
-screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
-WIDTH, HEIGHT = screen.get_size() # Get actual screen size
+# Fullscreen Setup: filled in by init_display() when the game starts, not at import
+screen = clock = font = small_font = title_font = None
+WIDTH, HEIGHT = 0, 0
 
-pygame.display.set_caption("Smash Bros Ultimate - Pygame")
-clock = pygame.time.Clock()
-font = pygame.font.Font(None, 36)
-small_font = pygame.font.Font(None, 24)
-title_font = pygame.font.Font(None, 72)
+def init_display():
+    # The window, clock and fonts come from the shared lazy runtime context
+    global screen, WIDTH, HEIGHT, clock, font, small_font, title_font
+    screen = runtime.screen
+    WIDTH, HEIGHT = runtime.WIDTH, runtime.HEIGHT # Get actual screen size
+    clock = runtime.clock
+    font, small_font, title_font = runtime.font, runtime.small_font, runtime.title_font
 
 class Projectile:
     def __init__(self, x, y, direction, owner, projectile_type, **kwargs):
@@ -899,6 +900,8 @@ def draw_char_select_screen(screen, char_list, p1_cursor, p2_cursor, p1_locked,
 # --- MAIN GAME ---
 
 def main():
+    init_display()
+    
     # --- Pokémon Stadium-style platform layout ---
     main_stage_width = WIDTH * 0.6
     main_stage_x = (WIDTH - main_stage_width) / 2
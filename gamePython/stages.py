@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import pickle
+import pygame
+from constants import *
+from game_platform import Platform
+from broadphase import PlatformGrid, index_platforms
+from render_cache import STAGES
+
+STAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "stages")
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "stages")
+CACHE_VERSION = 3 # Bump when the layout rules or the cached fields change
+FIGHTER_W, FIGHTER_H = 35, 55 # Character.w/h, for standing spawns on their platforms
+TILE = 512 # Background tile size for stages larger than the screen
+
+
+# --- STAGE FILES ---
+# A stage is data/stages/<name>.json listing platforms, spawn points and
+# blast zones against the world size. Lengths are pixels, or [fraction,
+# offset] pairs meaning fraction * world size + offset. A platform's x may be
+# "center"; with "anchor": i it is measured from platform i's left edge ("x")
+# or right edge ("right") instead. A spawn stands a fighter on a platform,
+# centred unless "at" gives a fraction of its width. Blast zone margins are
+# measured outward from the world edges.
+#
+# A stage with "size": [w, h] has that world size whatever the screen is,
+# and the game follows the fighters with a camera.Camera ("max_zoom" caps
+# how far it zooms in). "sleep_distance" lets projectiles that far from
+# every fighter sleep (ProjectilePool.update); stages without it never do.
+
+def stage_names():
+    return sorted(name[:-5] for name in os.listdir(STAGE_DIR) if name.endswith(".json"))
+
+def measure(value, size):
+    if isinstance(value, list):
+        fraction, offset = value
+        return fraction * size + offset
+    return value
+
+def layout_platforms(definitions, width, height):
+    platforms = []
+    spans = [] # Unrounded (x, w) of each platform, for anchors
+    for d in definitions:
+        w = measure(d["w"], width)
+        if "anchor" in d:
+            anchor_x, anchor_w = spans[d["anchor"]]
+            x = anchor_x + d["x"] if "x" in d else anchor_x + anchor_w - w + d["right"]
+        elif d["x"] == "center":
+            x = (width - w) / 2
+        else:
+            x = measure(d["x"], width)
+        spans.append((x, w))
+        platforms.append(Platform(x, measure(d["y"], height), w, measure(d["h"], height),
+                                  is_passable=d.get("passable", False)))
+    return platforms
+
+def spawn_points(platforms, spawns, char_w=FIGHTER_W, char_h=FIGHTER_H):
+    points = []
+    for spawn in spawns:
+        rect = platforms[spawn["platform"]].rect
+        x = rect.x + rect.w * spawn["at"] if "at" in spawn else rect.centerx
+        points.append((x - (char_w / 2), rect.top - char_h))
+    return points
+
+def gradient(width, height, top, rows):
+    # Rows top..top + rows of the world-high sky gradient, as a width x rows
+    # surface. Every row is one colour, so it is a 1-pixel column stretched
+    # sideways instead of a line per row.
+    column = pygame.Surface((1, rows))
+    for i in range(rows):
+        color_value = int(50 + ((top + i) / height) * 50)
+        column.set_at((0, i), (color_value, color_value, color_value + 50))
+    return pygame.transform.scale(column, (width, rows))
+
+def render_background(width, height, platforms):
+    # The gradient and the static platforms, baked into one opaque surface
+    background = gradient(width, height, 0, height)
+    for platform in platforms: platform.draw(background)
+    return background
+
+def render_tile(stage, tx, ty):
+    # One TILE x TILE piece of the world, drawn with world coordinates shifted onto it
+    x, y = tx * TILE, ty * TILE
+    tile = gradient(TILE, stage.height, y, TILE)
+    area = pygame.Rect(x, y, TILE, TILE)
+    for platform in (stage.index.query(area) if stage.index else stage.platforms):
+        if area.colliderect(platform.rect):
+            platform.draw(tile, -x, -y)
+    return tile
+
+
+# --- STAGES ---
+
+class Stage:
+    # One stage laid out for one world size, shared by every match on it
+    # (nothing may move or edit its platforms)
+    def __init__(self, name, title, width, height, platforms, spawns, blast_zone, index, max_zoom=1.0,
+                 sleep_distance=0):
+        self.name = name
+        self.title = title
+        self.width = width
+        self.height = height
+        self.platforms = platforms
+        self.spawns = spawns # Start (x, y) per player slot
+        self.blast_zone = blast_zone # (left, top, right, bottom): leaving it costs a stock
+        self.index = index # broadphase.PlatformGrid, or None when a scan is cheaper
+        self.max_zoom = max_zoom
+        self.sleep_distance = sleep_distance # 0 = projectiles never sleep
+
+    def background(self, width, height):
+        # Baked once per screen size and kept in STAGES
+        return STAGES.get((self, width, height), render_background, width, height, self.platforms)
+
+    def draw_view(self, surface, view):
+        # The part of the world under view (a world-space Rect) onto surface,
+        # from tiles baked on first sight; a tile never seen is never drawn
+        for ty in range(view.top // TILE, (view.bottom - 1) // TILE + 1):
+            for tx in range(view.left // TILE, (view.right - 1) // TILE + 1):
+                tile = STAGES.get((self, "tile", tx, ty), render_tile, self, tx, ty)
+                surface.blit(tile, (tx * TILE - view.x, ty * TILE - view.y))
+
+def compile_stage(name, definition, width, height):
+    width, height = definition.get("size", (width, height))
+    platforms = layout_platforms(definition["platforms"], width, height)
+    margins = definition.get("blast_zone", {})
+    blast_zone = (-margins.get("left", 100), -margins.get("top", 100),
+                  width + margins.get("right", 100), height + margins.get("bottom", 100))
+    return Stage(name, definition.get("name", name), width, height, platforms,
+                 spawn_points(platforms, definition["spawns"]), blast_zone, index_platforms(platforms),
+                 definition.get("max_zoom", 1.0), definition.get("sleep_distance", 0))
+
+
+# --- LOADING AND CACHING ---
+# load_stage() lays a stage out once per world size. The result is kept in
+# memory, so switching back costs a dict lookup, and pickled under .cache/
+# keyed by a hash of the JSON, so a fresh process skips the layout and the
+# index build too; editing the file invalidates its cache entries.
+
+_LOADED = {} # (name, width, height) -> Stage
+
+def cache_path(name, width, height):
+    return os.path.join(CACHE_DIR, f"{name}-{width}x{height}.pickle")
+
+def read_cache(name, width, height, digest):
+    try:
+        with open(cache_path(name, width, height), "rb") as f:
+            cached = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+    if cached.get("version") != CACHE_VERSION or cached.get("source") != digest:
+        return None
+    platforms = [Platform(*rect, is_passable=passable) for rect, passable in cached["platforms"]]
+    cells = cached["cells"]
+    index = PlatformGrid(platforms, cached["cell_size"], cells) if cells is not None else None
+    width, height = cached["size"]
+    return Stage(name, cached["title"], width, height, platforms, cached["spawns"], cached["blast_zone"], index,
+                 cached["max_zoom"], cached["sleep_distance"])
+
+def write_cache(stage, digest):
+    index = stage.index
+    cached = {"version": CACHE_VERSION, "source": digest, "title": stage.title, "size": (stage.width, stage.height),
+              "max_zoom": stage.max_zoom, "sleep_distance": stage.sleep_distance,
+              "platforms": [(tuple(p.rect), p.is_passable) for p in stage.platforms],
+              "spawns": stage.spawns, "blast_zone": stage.blast_zone,
+              "cells": index.cells if index else None, "cell_size": index.cell_size if index else None}
+    path = cache_path(stage.name, stage.width, stage.height)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(path + ".tmp", "wb") as f:
+            pickle.dump(cached, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(path + ".tmp", path) # Readers never see half a file
+    except OSError:
+        pass # A read-only install just lays stages out every run
+
+def load_stage(name=DEFAULT_STAGE, width=WIDTH, height=HEIGHT):
+    key = (name, width, height)
+    stage = _LOADED.get(key)
+    if stage is None:
+        with open(os.path.join(STAGE_DIR, name + ".json"), "rb") as f:
+            source = f.read()
+        digest = hashlib.sha1(source).hexdigest()
+        stage = read_cache(name, width, height, digest)
+        if stage is None:
+            stage = compile_stage(name, json.loads(source), width, height)
+            write_cache(stage, digest)
+        _LOADED[key] = stage
+    return stage
@@ -0,0 +1,140 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from simulation import Simulation
+from policies import POLICIES, make_policy
+
+CHAR_LIST = ["warrior", "ninja", "hunter", "knight", "mage", "beast"]
+
+
+# --- WORKER ---
+
+def play_match(p1_type, p2_type, policy_names, seed, max_frames):
+    sim = Simulation(p1_type, p2_type, seed=seed)
+    policies = [make_policy(name, seed * 2 + i) for i, name in enumerate(policy_names)]
+    sim.run(policies, max_frames)
+    p1, p2 = sim.characters
+    winner = sim.characters.index(sim.winner) if sim.winner else -1
+    return (winner, sim.frame, max(p1.stock, 0), max(p2.stock, 0), p1.damage_dealt, p2.damage_dealt)
+
+def play_chunk(job):
+    # One task per (pairing, seed range) keeps inter-process traffic small
+    p1_type, p2_type, policy_names, first_seed, count, max_frames = job
+    results = [play_match(p1_type, p2_type, policy_names, seed, max_frames)
+               for seed in range(first_seed, first_seed + count)]
+    return p1_type, p2_type, results
+
+
+# --- SUMMARY ---
+
+class MatchupMatrix:
+    def __init__(self, char_list):
+        self.char_list = char_list
+        self.cells = {(a, b): {"matches": 0, "p1_wins": 0, "p2_wins": 0, "draws": 0, "frames": 0,
+                               "p1_stocks": 0, "p2_stocks": 0, "p1_damage": 0, "p2_damage": 0}
+                      for a in char_list for b in char_list}
+
+    def add(self, p1_type, p2_type, results):
+        cell = self.cells[(p1_type, p2_type)]
+        for winner, frames, p1_stocks, p2_stocks, p1_damage, p2_damage in results:
+            cell["matches"] += 1
+            if winner == 0: cell["p1_wins"] += 1
+            elif winner == 1: cell["p2_wins"] += 1
+            else: cell["draws"] += 1
+            cell["frames"] += frames
+            cell["p1_stocks"] += p1_stocks
+            cell["p2_stocks"] += p2_stocks
+            cell["p1_damage"] += p1_damage
+            cell["p2_damage"] += p2_damage
+
+    def win_rate(self, a, b):
+        # Row fighter's win rate against the column fighter, counting both sides
+        wins = self.cells[(a, b)]["p1_wins"] + self.cells[(b, a)]["p2_wins"]
+        games = self.cells[(a, b)]["matches"] + self.cells[(b, a)]["matches"]
+        return wins / games if games else 0.0
+
+    def format(self):
+        width = max(len(c) for c in self.char_list) + 2
+        lines = ["win rate (row vs column)", " " * width + "".join(c[:7].rjust(8) for c in self.char_list)]
+        for a in self.char_list:
+            lines.append(a.ljust(width) + "".join(f"{self.win_rate(a, b):8.2f}" for b in self.char_list))
+        lines.append("")
+        lines.append(" " * width + "avg frames  avg stocks left  avg damage dealt")
+        for a in self.char_list:
+            matches = frames = stocks = damage = 0
+            for b in self.char_list:
+                as_p1 = self.cells[(a, b)]
+                as_p2 = self.cells[(b, a)]
+                matches += as_p1["matches"] + as_p2["matches"]
+                frames += as_p1["frames"] + as_p2["frames"]
+                stocks += as_p1["p1_stocks"] + as_p2["p2_stocks"]
+                damage += as_p1["p1_damage"] + as_p2["p2_damage"]
+            matches = max(matches, 1)
+            lines.append(a.ljust(width) + f"{frames / matches:10.0f}  {stocks / matches:15.2f}  {damage / matches:16.1f}")
+        return "\n".join(lines)
+
+    def to_json(self):
+        return {"characters": self.char_list,
+                "win_rate": [[self.win_rate(a, b) for b in self.char_list] for a in self.char_list],
+                "cells": {f"{a}:{b}": cell for (a, b), cell in self.cells.items()}}
+
+
+# --- RUNNER ---
+
+def make_jobs(char_list, policy_names, matches, chunk, max_frames, seed):
+    jobs = []
+    for i, p1_type in enumerate(char_list):
+        for j, p2_type in enumerate(char_list):
+            base = seed + (i * len(char_list) + j) * matches
+            for start in range(0, matches, chunk):
+                jobs.append((p1_type, p2_type, policy_names, base + start, min(chunk, matches - start), max_frames))
+    return jobs
+
+def run_tournament(char_list, policy_names, matches, workers=None, chunk=25, max_frames=60 * 60 * 5,
+                   seed=0, progress=None):
+    matrix = MatchupMatrix(char_list)
+    jobs = make_jobs(char_list, policy_names, matches, chunk, max_frames, seed)
+    with multiprocessing.Pool(workers) as pool:
+        for done, (p1_type, p2_type, results) in enumerate(pool.imap_unordered(play_chunk, jobs), 1):
+            matrix.add(p1_type, p2_type, results)
+            if progress:
+                progress(done, len(jobs))
+    return matrix
+
+def main():
+    parser = argparse.ArgumentParser(description="Play every fighter pairing headlessly across all cores.")
+    parser.add_argument("--matches", type=int, default=1000, help="matches per ordered pairing")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="scripted", help="input policy for both players")
+    parser.add_argument("--p2-policy", choices=sorted(POLICIES), help="input policy for player 2 (defaults to --policy)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--chunk", type=int, default=25, help="matches per task sent to a worker")
+    parser.add_argument("--max-frames", type=int, default=60 * 60 * 5, help="frame limit per match (draw after)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chars", nargs="+", choices=CHAR_LIST, default=CHAR_LIST)
+    parser.add_argument("--json", help="write the summary matrix to this file")
+    args = parser.parse_args()
+
+    policy_names = (args.policy, args.p2_policy or args.policy)
+    start = time.perf_counter()
+
+    def progress(done, total):
+        print(f"\r{done}/{total} tasks  {time.perf_counter() - start:6.1f}s", end="", file=sys.stderr, flush=True)
+
+    matrix = run_tournament(args.chars, policy_names, args.matches, args.workers, args.chunk,
+                            args.max_frames, args.seed, progress)
+    elapsed = time.perf_counter() - start
+    total = args.matches * len(args.chars) ** 2
+    print(file=sys.stderr)
+    print(matrix.format())
+    print(f"\n{total} matches in {elapsed:.1f}s on {args.workers} workers")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(matrix.to_json(), f, indent=2)
+
+if __name__ == "__main__":
+    main()